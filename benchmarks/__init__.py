@@ -0,0 +1,3 @@
+"""
+    benchmarks and synthetic data generators (not used when serving)
+"""
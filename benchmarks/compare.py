@@ -0,0 +1,53 @@
+"""
+    compares two benchmarks.run reports endpoint by endpoint
+
+    usage: python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "queries", "peak_memory_kb")
+
+
+def change(before, after):
+    """
+    returns after as text with its relative change from before
+    """
+    if not before:
+        return f"{after}"
+    return f"{after} ({(after - before) / before:+.0%})"
+
+
+def main():
+    """
+    prints a table of every metric of every endpoint found in both reports
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+
+    print(f"{before['commit']} -> {after['commit']}")
+    for database, results in after["databases"].items():
+        if database not in before["databases"]:
+            continue
+        old = before["databases"][database]["endpoints"]
+        print(f"\n{results['dialect']} ({database})")
+        print(f"{'endpoint':<24}" + "".join(f"{metric:>22}" for metric in METRICS))
+        for name, new in results["endpoints"].items():
+            if name in old:
+                print(
+                    f"{name:<24}"
+                    + "".join(
+                        f"{change(old[name][metric], new[metric]):>22}"
+                        for metric in METRICS
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
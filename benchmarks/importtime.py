@@ -0,0 +1,63 @@
+"""
+    reports how long a serving worker takes to import and create the app
+    and which modules (or packages) that time goes to, from a fresh
+    interpreter run with python -X importtime
+
+    usage: python -m benchmarks.importtime [--by module] [--top 25]
+"""
+import argparse
+import subprocess
+import sys
+from collections import Counter
+
+BOOT = (
+    "import time; start = time.perf_counter(); import guineapigs; "
+    "guineapigs.create_app(); print(time.perf_counter() - start)"
+)
+
+
+def profile(code=BOOT):
+    """
+    runs code in a new interpreter, returns (seconds it printed,
+    [(module, self microseconds, cumulative microseconds)] of its imports)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, module = line[len("import time:") :].split("|")
+        if self_time.strip().isdecimal():
+            imports.append((module.strip(), int(self_time), int(cumulative)))
+    return float(result.stdout.split()[-1]), imports
+
+
+def main():
+    """
+    parses arguments and prints the most expensive modules or packages
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--by", choices=["module", "package"], default="package")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    seconds, imports = profile()
+    costs = Counter()
+    for module, self_time, _ in imports:
+        costs[module.split(".")[0] if args.by == "package" else module] += self_time
+    total = sum(costs.values())
+    print(
+        f"app created in {seconds * 1000:.1f}ms, {len(imports)} modules "
+        f"imported in {total / 1000:.1f}ms"
+    )
+    for name, cost in costs.most_common(args.top):
+        print(f"{cost / 1000:9.1f}ms {cost / total:6.1%}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+    compares query plans and latency of the entry time range queries
+    without and with the entry indexes
+
+    usage: python -m benchmarks.seed && python -m benchmarks.indexes
+"""
+import argparse
+import time
+from datetime import timedelta
+from sqlalchemy import inspect
+from guineapigs import create_app, models
+from guineapigs.extensions import db
+from guineapigs.utils import (
+    beginning_of_day_utc,
+    beginning_of_week_utc,
+    local_today,
+    next_day,
+)
+
+TABLES = (
+    models.FoodEntry.__table__,
+    models.WeightEntry.__table__,
+    models.VitaminCEntry.__table__,
+    models.food_entries,
+)
+
+
+def queries():
+    """
+    returns {label: query} for the queries served on every page load
+    """
+    today = beginning_of_day_utc()
+    week = beginning_of_week_utc()
+    month = today - timedelta(days=30)
+    return {
+        "dashboard food entries": db.session.query(models.FoodEntry)
+        .filter(models.FoodEntry.utc_date >= today)
+        .order_by(models.FoodEntry.utc_date),
+        "vitamin c today": models.VitaminCEntry.query.filter(
+            models.VitaminCEntry.local_day == local_today()
+        ).limit(1),
+        "history food entries (week)": db.session.query(models.FoodEntry)
+        .filter(models.FoodEntry.utc_date >= week)
+        .filter(models.FoodEntry.utc_date < next_day(today))
+        .order_by(models.FoodEntry.utc_date),
+        "history weight entries (month)": db.session.query(models.WeightEntry)
+        .filter(models.WeightEntry.utc_date >= month)
+        .filter(models.WeightEntry.utc_date < next_day(today))
+        .order_by(models.WeightEntry.utc_date),
+        "most recent weights": models.WeightEntry.get_most_recent(),
+    }
+
+
+def explain(query):
+    """
+    returns the database's query plan for query as a list of lines
+    """
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    if db.engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN ANALYZE "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    rows = db.engine.execute(prefix + str(compiled), params).fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+def timeit(func, repeat):
+    """
+    returns the median wall time of func in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return sorted(timings)[len(timings) // 2]
+
+
+def run(label, repeat):
+    """
+    prints plan and latency for each query and for the statistics page
+    """
+    print(f"### {label}")
+    for name, query in queries().items():
+        print(f"{name}: {timeit(query.all, repeat):.2f}ms")
+        for line in explain(query):
+            print(f"    {line}")
+    print(f"food statistics: {timeit(models.FoodEntry.get_statistics, repeat):.2f}ms")
+
+
+def main():
+    """
+    runs the queries without the indexes, recreates them and runs them again
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    indexes = [index for table in TABLES for index in table.indexes]
+    with create_app().app_context():
+        for index in indexes:
+            if _exists(index):
+                index.drop(bind=db.engine)
+        _analyze()
+        run("without indexes", args.repeat)
+        for index in indexes:
+            index.create(bind=db.engine)
+        _analyze()
+        run("with indexes", args.repeat)
+
+
+def _exists(index):
+    names = {i["name"] for i in inspect(db.engine).get_indexes(index.table.name)}
+    return index.name in names
+
+
+def _analyze():
+    db.engine.execute("ANALYZE")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+    compares the DISTINCT ON latest weight query with the correlated
+    per guinea pig lookup used by WeightEntry.get_most_recent
+
+    usage: python -m benchmarks.seed && python -m benchmarks.latest_weight
+"""
+import argparse
+from guineapigs import create_app, models
+from guineapigs.extensions import db
+from benchmarks.indexes import explain, timeit
+
+
+def distinct_on_query():
+    """
+    returns the previous implementation, which sorts every weight entry
+    (DISTINCT ON is postgres only, other databases return every entry)
+    """
+    return (
+        db.session.query(  # pylint: disable=no-member
+            models.GuineaPig.name, models.WeightEntry.value
+        )
+        .outerjoin(models.WeightEntry)
+        .distinct(models.GuineaPig.name)
+        .order_by(models.GuineaPig.name, models.WeightEntry.utc_date.desc())
+    )
+
+
+def main():
+    """
+    prints row count, median latency and plan of both queries
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    with create_app().app_context():
+        for label, query in (
+            ("distinct on", distinct_on_query()),
+            ("correlated lookup", models.WeightEntry.get_most_recent()),
+        ):
+            rows = query.all()
+            print(
+                f"{label}: {len(rows)} rows, {timeit(query.all, args.repeat):.2f}ms"
+            )
+            for line in explain(query):
+                print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+    renders history.html with synthetic rows to compare timestamp conversion
+    done per row with pytz against the memoized utils.strftime
+
+    usage: python -m benchmarks.render [--rows 10000]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import pytz
+from flask import render_template
+from guineapigs import create_app
+from guineapigs.history import HistoryRow
+from guineapigs.private.forms import HistoryForm
+from guineapigs.utils import local_time
+
+FORMAT = "%Y-%m-%d %H:%M %p"
+
+app = create_app()
+
+
+def pytz_strftime(datetime_instance, str_format):
+    """
+    previous implementation of utils.strftime
+    """
+    return (
+        datetime_instance.replace(tzinfo=pytz.utc)
+        .astimezone(app.config["TIMEZONE"])
+        .strftime(str_format)
+    )
+
+
+def rows(count):
+    """
+    returns count HistoryRows spread over the last year, newest first
+    """
+    now = datetime.utcnow()
+    step = timedelta(days=365) / count
+    return [
+        HistoryRow(now - step * i, i, "food", "hay", "pig 1, pig 2", "user")
+        for i in range(count)
+    ]
+
+
+def median_ms(function, repeat):
+    """
+    returns the median wall time of function in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    """
+    prints median time to format every row and to render history.html
+    with both strftime versions
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    entries = rows(args.rows)
+    with app.test_request_context("/history"):
+        form = HistoryForm()
+        memoized = local_time(app.config["TIMEZONE"]).strftime
+        for label, function in (("pytz", pytz_strftime), ("memoized", memoized)):
+            format_ms = median_ms(
+                lambda: [  # pylint: disable=cell-var-from-loop
+                    function(entry.utc_date, FORMAT) for entry in entries
+                ],
+                args.repeat,
+            )
+            render_ms = median_ms(
+                lambda: render_template(  # pylint: disable=cell-var-from-loop
+                    "history.html", form=form, entries=entries, strftime=function
+                ),
+                args.repeat,
+            )
+            print(f"{label}: format {format_ms:.1f}ms, render {render_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+    times every page and form through the Flask test client and writes
+    p50/p95 latency, SQL statements and peak memory per endpoint as JSON
+
+    usage: python -m benchmarks.run --database sqlite:////tmp/bench.db \
+        --database postgresql:///guineapigs_bench --seed --output results.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from guineapigs import create_app, models
+from guineapigs.cache import page_cache, reference_cache, user_cache
+from guineapigs.extensions import db
+from guineapigs.utils import local_today
+from benchmarks.seed import seed
+
+app = create_app()
+
+
+def _new_food_entry(food_type_id):
+    """
+    adds a food entry for the delete benchmark, returns its form data
+    """
+    with app.app_context():
+        entry = models.FoodEntry(food_type_id=food_type_id)
+        db.session.add(entry)  # pylint: disable=no-member
+        db.session.flush()  # pylint: disable=no-member
+        models.FoodStatistic.add_entry(food_type_id, entry.utc_date)
+        db.session.commit()  # pylint: disable=no-member
+        return {"id": entry.id}
+
+
+def endpoints():
+    """
+    returns [(name, method, url, form data)] of the benchmarked requests,
+    form data may be a function returning it for each request
+    """
+    with app.app_context():
+        today = local_today()
+        food_type_id = models.FoodType.query.first().id
+        guinea_pig_id = models.GuineaPig.query.first().id
+    ranges = {"week": 6, "month": 30, "year": 365}
+    return [
+        ("dashboard", "GET", "/", None),
+        *(
+            (
+                f"history ({label})",
+                "GET",
+                f"/history?start={today - timedelta(days=days)}&end={today}",
+                None,
+            )
+            for label, days in ranges.items()
+        ),
+        ("statistics", "GET", "/statistics", None),
+        ("settings", "GET", "/settings", None),
+        ("food entry form", "GET", "/food_entry/add", None),
+        ("weight entry form", "GET", "/weight_entry/add", None),
+        ("guinea pig form", "GET", "/guinea_pig/add", None),
+        ("food type form", "GET", "/food_type/add", None),
+        (
+            "food entry submit",
+            "POST",
+            "/food_entry/add",
+            {"food_type_id": food_type_id, "guinea_pig_ids": [guinea_pig_id]},
+        ),
+        (
+            "weight entry submit",
+            "POST",
+            "/weight_entry/add",
+            {"value": "1000", "guinea_pig_id": guinea_pig_id},
+        ),
+        ("vitamin c toggle", "GET", "/vitaminc", None),
+        (
+            "food entry delete",
+            "POST",
+            "/food_entry/delete",
+            lambda: _new_food_entry(food_type_id),
+        ),
+    ]
+
+
+class QueryCounter:  # pylint: disable=too-few-public-methods
+    """
+    counts SQL statements executed by any engine
+    """
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self)
+
+    def __call__(self, *_args):
+        self.count += 1
+
+
+def percentile(values, fraction):
+    """
+    returns the nearest-rank percentile of values
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def request(client, method, url, data):
+    """
+    sends a request, reads the whole (possibly streamed) body and closes it
+    """
+    response = client.open(url, method=method, data=data)
+    response.get_data()
+    response.close()
+    assert response.status_code < 400, f"{method} {url}: {response.status}"
+
+
+def measure(client, counter, method, url, data, repeat):
+    """
+    returns latency percentiles, statements and peak memory of one endpoint
+    """
+
+    def form():
+        return data() if callable(data) else data
+
+    request(client, method, url, form())
+    timings, queries = [], 0
+    for _ in range(repeat):
+        form_data = form()
+        counter.count = 0
+        start = time.perf_counter()
+        request(client, method, url, form_data)
+        timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, counter.count)
+    form_data = form()
+    tracemalloc.start()
+    request(client, method, url, form_data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "queries": queries,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(database, counter, repeat, seed_years):
+    """
+    benchmarks every endpoint against database, seeding it first if asked
+    """
+    app.config["SQLALCHEMY_DATABASE_URI"] = database
+    user_cache.clear()
+    reference_cache.clear()
+    page_cache.clear()
+    with app.app_context():
+        db.create_all()
+        if seed_years and not models.FoodEntry.query.first():
+            seed(years=seed_years)
+        dialect = db.engine.dialect.name
+        rows = models.FoodEntry.query.count()
+    client = app.test_client()
+    client.post("/login", data={"name": "benchmark"})
+    results = {
+        name: measure(client, counter, method, url, data, repeat)
+        for name, method, url, data in endpoints()
+    }
+    with app.app_context():
+        db.engine.dispose()
+    return {"dialect": dialect, "food_entries": rows, "endpoints": results}
+
+
+def main():
+    """
+    parses arguments, runs the benchmarks and writes the JSON report
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--database",
+        action="append",
+        help="database URI to benchmark, may be repeated "
+        "(defaults to SQLALCHEMY_DATABASE_URI)",
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--seed",
+        type=int,
+        nargs="?",
+        const=3,
+        default=0,
+        metavar="YEARS",
+        help="seed empty databases with YEARS (default 3) of entries",
+    )
+    parser.add_argument("--output", help="JSON file to write, stdout by default")
+    args = parser.parse_args()
+
+    app.config.update(
+        WTF_CSRF_ENABLED=False,
+        SESSION_COOKIE_SECURE=False,
+        REMEMBER_COOKIE_SECURE=False,
+    )
+    counter = QueryCounter()
+    databases = args.database or [app.config["SQLALCHEMY_DATABASE_URI"]]
+    report = {
+        "commit": subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip(),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "databases": {
+            database: run(database, counter, args.repeat, args.seed)
+            for database in databases
+        },
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+    seeds the configured database with a synthetic multi-year dataset
+
+    usage: python -m benchmarks.seed [--years 3] [--pigs 3] [--food-types 20]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from guineapigs import create_app, models
+from guineapigs.extensions import db
+from guineapigs.utils import to_local_date
+
+CHUNK_SIZE = 5000
+
+
+def _next_id(table):
+    return (db.session.query(db.func.max(table.c.id)).scalar() or 0) + 1
+
+
+def _insert(table, rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[i : i + CHUNK_SIZE])
+
+
+def _reset_sequences(*tables):
+    """
+    explicit ids are inserted, so postgres sequences need to catch up
+    """
+    if db.engine.dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.session.execute(
+            db.text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+                f"(SELECT max(id) FROM \"{table.name}\"))"
+            )
+        )
+
+
+def seed(  # pylint: disable=too-many-arguments,too-many-locals
+    years=3, pigs=3, food_types=20, users=3, feedings_per_day=6, seed_=0
+):
+    """
+    generates users, guinea pigs, food types and `years` worth of food,
+    weight and vitamin C entries ending now, and rebuilds the statistics
+    and rollups from them. returns row counts per table
+    """
+    rng = random.Random(seed_)
+    user_table = models.User.__table__
+    pig_table = models.GuineaPig.__table__
+    food_type_table = models.FoodType.__table__
+    food_table = models.FoodEntry.__table__
+    weight_table = models.WeightEntry.__table__
+    vitamin_c_table = models.VitaminCEntry.__table__
+
+    user_id, pig_id, food_type_id = (
+        _next_id(user_table),
+        _next_id(pig_table),
+        _next_id(food_type_table),
+    )
+    user_ids = list(range(user_id, user_id + users))
+    pig_ids = list(range(pig_id, pig_id + pigs))
+    food_type_ids = list(range(food_type_id, food_type_id + food_types))
+    _insert(user_table, [{"id": i, "name": f"seed-user-{i}"} for i in user_ids])
+    _insert(pig_table, [{"id": i, "name": f"seed-pig-{i}"} for i in pig_ids])
+    _insert(
+        food_type_table,
+        [
+            {
+                "id": i,
+                "label": f"seed food {i}",
+                "in_statistics": True,
+                "is_hidden": False,
+            }
+            for i in food_type_ids
+        ],
+    )
+
+    food_id = _next_id(food_table)
+    food_rows, food_pig_rows, weight_rows, vitamin_c_rows = [], [], [], []
+    vitamin_c_days = set()
+    weights = {pig: rng.uniform(800, 1200) for pig in pig_ids}
+    end = datetime.utcnow()
+    day = end - timedelta(days=365 * years)
+    while day < end:
+        for _ in range(feedings_per_day):
+            utc_date = day + timedelta(seconds=rng.randrange(24 * 60 * 60))
+            food_rows.append(
+                {
+                    "id": food_id,
+                    "utc_date": utc_date,
+                    "food_type_id": rng.choice(food_type_ids),
+                    "user_id": rng.choice(user_ids),
+                }
+            )
+            food_pig_rows.extend(
+                {"food_entry_id": food_id, "guinea_pig_id": pig}
+                for pig in rng.sample(pig_ids, rng.randint(1, pigs))
+            )
+            food_id += 1
+        utc_date = day + timedelta(hours=rng.randrange(24))
+        if (local_day := to_local_date(utc_date)) not in vitamin_c_days:
+            vitamin_c_days.add(local_day)
+            vitamin_c_rows.append(
+                {
+                    "utc_date": utc_date,
+                    "local_day": local_day,
+                    "user_id": rng.choice(user_ids),
+                }
+            )
+        if day.weekday() == 0:
+            for pig in pig_ids:
+                weights[pig] += rng.uniform(-20, 20)
+                weight_rows.append(
+                    {
+                        "utc_date": day + timedelta(hours=rng.randrange(24)),
+                        "value": round(weights[pig], 1),
+                        "guinea_pig_id": pig,
+                        "user_id": rng.choice(user_ids),
+                    }
+                )
+        day += timedelta(days=1)
+
+    _insert(food_table, food_rows)
+    _insert(models.food_entries, food_pig_rows)
+    _insert(weight_table, weight_rows)
+    _insert(vitamin_c_table, vitamin_c_rows)
+    _reset_sequences(user_table, pig_table, food_type_table, food_table)
+    # derived tables the statistics page and API read
+    models.FoodStatistic.rebuild()
+    models.FoodRollup.refresh()
+    models.WeightRollup.rebuild()
+    models.DataVersion.bump(
+        "user",
+        "guinea_pig",
+        "food_type",
+        "food_entry",
+        "weight_entry",
+        "vitamin_c_entry",
+    )
+    db.session.commit()
+    return {
+        "user": len(user_ids),
+        "guinea_pig": len(pig_ids),
+        "food_type": len(food_type_ids),
+        "food_entry": len(food_rows),
+        "food_entries": len(food_pig_rows),
+        "weight_entry": len(weight_rows),
+        "vitamin_c_entry": len(vitamin_c_rows),
+    }
+
+
+def main():
+    """
+    parses arguments and seeds the database in SQLALCHEMY_DATABASE_URI
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--pigs", type=int, default=3)
+    parser.add_argument("--food-types", type=int, default=20)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--feedings-per-day", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with create_app().app_context():
+        db.create_all()
+        counts = seed(
+            args.years,
+            args.pigs,
+            args.food_types,
+            args.users,
+            args.feedings_per_day,
+            args.seed,
+        )
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+    serves the app over HTTP and compares time to first byte, total time,
+    bytes on the wire and peak memory of large history pages and exports,
+    rendered in one piece or streamed, uncompressed or compressed, on the
+    database in SQLALCHEMY_DATABASE_URI (seed it with benchmarks.seed)
+
+    usage: python -m benchmarks.ttfb [--repeat 5] [--page-size 100000]
+"""
+import argparse
+import http.client
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from flask import render_template
+from werkzeug.serving import make_server
+from guineapigs import create_app
+from guineapigs.compression import compression
+from guineapigs.private import views
+from guineapigs.utils import local_today
+
+app = create_app()
+
+
+@contextmanager
+def buffered():
+    """
+    renders history pages in one piece, like before they were streamed
+    """
+    stream_template = views.stream_template
+    views.stream_template = render_template
+    try:
+        yield
+    finally:
+        views.stream_template = stream_template
+
+
+def pages():
+    """
+    returns [(name, url)] of the benchmarked pages
+    """
+    with app.app_context():
+        today = local_today()
+    year = f"start={today - timedelta(days=365)}&end={today}"
+    return [
+        ("history (month)", f"/history?start={today - timedelta(days=30)}&end={today}"),
+        ("history (year)", f"/history?{year}"),
+        ("export (year)", f"/history/export.csv?{year}"),
+    ]
+
+
+def fetch(port, url, headers):
+    """
+    returns (seconds until the response started, seconds until its end,
+    body bytes as sent) of a GET request
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    start = time.perf_counter()
+    connection.request("GET", url, headers=headers)
+    response = connection.getresponse()
+    first_byte = time.perf_counter() - start
+    size = len(response.read())
+    total = time.perf_counter() - start
+    connection.close()
+    assert response.status == 200, f"{url}: {response.status}"
+    return first_byte, total, size
+
+
+def measure(port, url, headers, repeat):
+    """
+    returns median time to first byte and total time, body bytes and peak
+    memory of url
+    """
+    fetch(port, url, headers)
+    timings = sorted(fetch(port, url, headers)[:2] for _ in range(repeat))
+    tracemalloc.start()
+    size = fetch(port, url, headers)[2]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    first_byte, total = timings[len(timings) // 2]
+    return {
+        "ttfb_ms": round(first_byte * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+        "bytes": size,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    """
+    prints a table of every page in every rendering mode and encoding
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--page-size", type=int, default=100000, help="HISTORY_PAGE_SIZE to use"
+    )
+    args = parser.parse_args()
+    app.config.update(
+        HISTORY_PAGE_SIZE=args.page_size,
+        WTF_CSRF_ENABLED=False,
+        SESSION_COOKIE_SECURE=False,
+        REMEMBER_COOKIE_SECURE=False,
+    )
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    connection = http.client.HTTPConnection("127.0.0.1", server.port)
+    connection.request(
+        "POST",
+        "/login",
+        body="name=benchmark",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    cookie = connection.getresponse().getheader("Set-Cookie").split(";")[0]
+    connection.close()
+
+    encodings = ["identity", *reversed(list(compression.encodings))]
+    print(
+        f"{'page':<16}{'rendering':<11}{'encoding':<10}"
+        f"{'ttfb ms':>9}{'total ms':>10}{'bytes':>10}{'peak kb':>10}"
+    )
+    for name, url in pages():
+        for rendering in ("buffered", "streamed"):
+            if rendering == "buffered" and not url.startswith("/history?"):
+                continue
+            for encoding in encodings:
+                headers = {"Cookie": cookie, "Accept-Encoding": encoding}
+                if rendering == "buffered":
+                    with buffered():
+                        result = measure(server.port, url, headers, args.repeat)
+                else:
+                    result = measure(server.port, url, headers, args.repeat)
+                print(
+                    f"{name:<16}{rendering:<11}{encoding:<10}"
+                    f"{result['ttfb_ms']:>9}{result['total_ms']:>10}"
+                    f"{result['bytes']:>10}{result['peak_memory_kb']:>10}"
+                )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 """
-    imports created app from app module
+    exposes the app factory, run with gunicorn "guineapigs:create_app()"
 """
-from guineapigs.app import app
+from guineapigs.app import create_app
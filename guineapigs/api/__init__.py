@@ -0,0 +1,4 @@
+"""
+    JSON API for logged in users
+"""
+from . import views
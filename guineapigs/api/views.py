@@ -0,0 +1,212 @@
+"""
+    JSON routes for logged in user, answered with 304 Not Modified while
+    the tables a response is built from haven't changed
+"""
+import hashlib
+from functools import wraps
+from itertools import groupby
+from flask import abort, Blueprint, current_app, jsonify, request
+from flask_login import login_required
+from guineapigs import history as history_, models
+from guineapigs.private.forms import (
+    FoodFrequencyForm,
+    HistoryForm,
+    WeightTrendForm,
+)
+from guineapigs.replica import use_replica
+from guineapigs.utils import (
+    beginning_of_day_utc,
+    decode_cursor,
+    local_date_to_utc,
+    local_today,
+    next_day,
+)
+
+blueprint = Blueprint("api", __name__, url_prefix="/api")
+
+ENTRY_TABLES = ("user", "guinea_pig", "food_type", "food_entry")
+
+
+def conditional(*tables):
+    """
+    decorates a view to send an ETag built from the data versions of tables,
+    today's date and the request URL, and to answer a matching If-None-Match
+    (compared weakly, compression weakens the ETag) with 304 before running
+    the view
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = models.DataVersion.get_all()
+            etag = hashlib.sha1(
+                repr(
+                    (
+                        request.full_path,
+                        local_today(),
+                        [versions.get(table, 0) for table in tables],
+                    )
+                ).encode()
+            ).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = view(*args, **kwargs)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _food_entry(entry):
+    return {
+        "id": entry.id,
+        "utc_date": entry.utc_date.isoformat(),
+        "food_type": entry.food_type.label,
+        "notes": entry.notes,
+        "guinea_pigs": [guinea_pig.name for guinea_pig in entry.guinea_pigs],
+        "user": entry.user.name if entry.user else None,
+    }
+
+
+@blueprint.route("/dashboard")
+@use_replica
+@login_required
+@conditional(*ENTRY_TABLES, "vitamin_c_entry")
+def dashboard():
+    """
+    returns today's vitamin c entry and food entries
+    """
+    vitamin_c = models.VitaminCEntry.get_today()
+    return jsonify(
+        vitamin_c={
+            "utc_date": vitamin_c.utc_date.isoformat(),
+            "user": vitamin_c.user.name if vitamin_c.user else None,
+        }
+        if vitamin_c
+        else None,
+        food_entries=[
+            _food_entry(entry)
+            for entry in models.FoodEntry.get_in_time_range(
+                beginning_of_day_utc(), eager=True
+            )
+        ],
+    )
+
+
+@blueprint.route("/statistics")
+@use_replica
+@login_required
+@conditional("guinea_pig", "food_type", "food_entry", "weight_entry")
+def statistics():
+    """
+    returns food statistics and the latest weight of each guinea pig
+    """
+    return jsonify(
+        food=models.FoodEntry.get_statistics(),
+        weights=[
+            {"guinea_pig": name, "value": value}
+            for name, value in models.WeightEntry.get_most_recent()
+        ],
+    )
+
+
+@blueprint.route("/food_frequency")
+@use_replica
+@login_required
+@conditional("guinea_pig", "food_type", "food_entry")
+def food_frequency():
+    """
+    returns how many times each food type was fed, in total and to each
+    guinea pig, between start and end (the last 30 days by default)
+    """
+    form = FoodFrequencyForm.from_args(request.args)
+    if not form.validate():
+        return abort(400)
+
+    return jsonify(
+        food_types=[
+            {
+                "id": frequency.food_type_id,
+                "label": frequency.label,
+                "count": frequency.count,
+                "guinea_pigs": frequency.guinea_pigs,
+            }
+            for frequency in models.FoodRollup.get_frequencies(
+                form.start.data, form.end.data
+            )
+        ]
+    )
+
+
+@blueprint.route("/history")
+@use_replica
+@login_required
+@conditional(*ENTRY_TABLES, "weight_entry", "vitamin_c_entry")
+def history():
+    """
+    returns one page of history entries, newest first, and the cursor of
+    the next page (pass it as ?before= to get that page)
+    """
+    form = HistoryForm.from_args(request.args)
+    if not form.validate():
+        return abort(400)
+
+    entries, next_cursor = history_.paginate(
+        local_date_to_utc(form.start.data),
+        local_date_to_utc(next_day(form.end.data)),
+        decode_cursor(request.args.get("before")),
+        current_app.config["HISTORY_PAGE_SIZE"],
+    )
+    return jsonify(
+        entries=[history_.serialize(entry)._asdict() for entry in entries],
+        next=next_cursor,
+    )
+
+
+@blueprint.route("/weights")
+@use_replica
+@login_required
+@conditional("guinea_pig", "weight_entry")
+def weights():
+    """
+    returns min, average, max and last weight of each guinea pig per day,
+    week or month between start and end (the last year by default)
+    """
+    form = WeightTrendForm.from_args(request.args)
+    if not form.validate():
+        return abort(400)
+
+    buckets = models.WeightRollup.get_trend(
+        form.start.data,
+        form.end.data,
+        form.period.data,
+        None if form.guinea_pig_id.data is None else [form.guinea_pig_id.data],
+    )
+    return jsonify(
+        period=form.period.data,
+        guinea_pigs=[
+            {
+                "id": guinea_pig_id,
+                "name": name,
+                "buckets": [
+                    {
+                        "start": bucket.start.isoformat(),
+                        "min": bucket.min,
+                        "avg": bucket.avg,
+                        "max": bucket.max,
+                        "last": bucket.last,
+                        "count": bucket.count,
+                    }
+                    for bucket in pig_buckets
+                ],
+            }
+            for (guinea_pig_id, name), pig_buckets in groupby(
+                buckets, key=lambda bucket: (bucket.guinea_pig_id, bucket.name)
+            )
+        ],
+    )
@@ -1,23 +1,29 @@
 """
     where all the magic starts
 """
+import os
 from flask import Flask
-from guineapigs import private, public
+from guineapigs import api, assets, metrics, pool, private, public, replica
+from guineapigs.cache import page_cache, reference_cache, user_cache
+from guineapigs.compression import compression
 from guineapigs.config import Config
-from guineapigs.extensions import bootstrap, db, login_manager, migrate
-from guineapigs.utils import strftime
+from guineapigs.extensions import bootstrap, db, login_manager
+from guineapigs.utils import local_time
 
 
-def init_flask():
+def create_app(config=Config):
     """
-    Initializes Flask flask_app with and registers extentions, blueprints,
-    and utils
+    Creates Flask app and registers extentions, blueprints and utils, plus
+    cli commands and database migrations when run by the flask command
+    (serving workers skip them, Flask-Migrate imports all of alembic)
     """
     flask_app = Flask(__name__)
-    flask_app.config.from_object(Config)
+    flask_app.config.from_object(config)
     register_extensions(flask_app)
     register_blueprints(flask_app)
     register_utils(flask_app)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        register_commands(flask_app)
     return flask_app
 
 
@@ -26,9 +32,16 @@ def register_extensions(flask_app):
     Registers app extensions
     """
     bootstrap.init_app(flask_app)
+    pool.init_app(flask_app)
+    replica.init_app(flask_app)
     db.init_app(flask_app)
-    migrate.init_app(flask_app, db)
     login_manager.init_app(flask_app)
+    user_cache.init_app(flask_app)
+    reference_cache.init_app(flask_app)
+    page_cache.init_app(flask_app)
+    metrics.init_app(flask_app)
+    assets.init_app(flask_app)
+    compression.init_app(flask_app)
 
 
 def register_blueprints(flask_app):
@@ -37,13 +50,29 @@ def register_blueprints(flask_app):
     """
     flask_app.register_blueprint(public.views.blueprint)
     flask_app.register_blueprint(private.views.blueprint)
+    flask_app.register_blueprint(api.views.blueprint)
 
 
 def register_utils(flask_app):
     """
     Registers functions for access in templates
     """
+    strftime = local_time(flask_app.config["TIMEZONE"]).strftime
     flask_app.context_processor(lambda: {"strftime": strftime})
 
 
-app = init_flask()
+def register_commands(flask_app):
+    """
+    Registers flask cli commands and Flask-Migrate (flask db)
+    """
+    # pylint: disable=import-outside-toplevel
+    from flask_migrate import Migrate
+    from guineapigs import commands
+
+    Migrate(flask_app, db)
+    flask_app.cli.add_command(commands.build_assets)
+    flask_app.cli.add_command(commands.import_entries)
+    flask_app.cli.add_command(commands.manage_partitions)
+    flask_app.cli.add_command(commands.rebuild_food_rollup)
+    flask_app.cli.add_command(commands.rebuild_statistics)
+
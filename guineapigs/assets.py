@@ -0,0 +1,176 @@
+"""
+    fingerprinted, precompressed copies of the static files
+
+    `flask build-assets` copies every static file to ASSETS_DIR with a hash
+    of its content in its name (css/style.css -> css/style.0123abcd4567.css),
+    rewriting the url()s of stylesheets and source map comments of scripts
+    to the fingerprinted names, and writes gzip (and brotli, if the brotli
+    module is installed) variants of text files next to them. templates
+    link them with asset_url(), and they're served from /assets cached for
+    a year since a changed file gets a new name. without a build asset_url()
+    falls back to the plain static files
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+from flask import current_app, request, send_from_directory, url_for
+
+MANIFEST = "manifest.json"
+# already compressed formats aren't worth precompressing
+COMPRESSIBLE = {".css", ".eot", ".ico", ".js", ".map", ".svg", ".ttf", ".txt"}
+# files whose references to other static files are rewritten
+REWRITTEN = {".css", ".js"}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_SOURCE_MAP = re.compile(r"(sourceMappingURL=)(\S+)")
+_SUFFIX = re.compile(r"([^?#]*)(.*)", re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(path, content):
+    """
+    returns path with a hash of content before its extension
+    """
+    root, extension = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha1(content).hexdigest()[:12]}{extension}"
+
+
+def _rewrite(path, content, manifest):
+    """
+    returns content of stylesheet or script path with the static files it
+    references replaced by their fingerprinted names
+    """
+
+    def replace(reference):
+        if reference.startswith(("/", "data:", "#")) or "//" in reference:
+            return reference
+        # keeps query strings and fragments like the font's ?#iefix
+        target, suffix = _SUFFIX.match(reference).groups()
+        source = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        if source not in manifest:
+            return reference
+        hashed = posixpath.relpath(manifest[source], posixpath.dirname(path) or ".")
+        return hashed + suffix
+
+    text = content.decode("utf-8")
+    text = _URL.sub(
+        lambda match: f"url({match[1]}{replace(match[2])}{match[1]})", text
+    )
+    text = _SOURCE_MAP.sub(lambda match: match[1] + replace(match[2]), text)
+    return text.encode("utf-8")
+
+
+def _compressors():
+    """
+    returns [(file suffix, compress function)] of the available encodings
+    """
+    compressors = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    try:
+        import brotli  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        logger.warning("brotli is not installed, only gzip variants are built")
+    else:
+        compressors.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+
+def _write(path, content):
+    """
+    writes content to path through a temporary file, creating directories
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(content)
+    os.replace(temporary, path)
+
+
+def build(static_folder, output):
+    """
+    writes fingerprinted and compressed copies of the files in static_folder
+    and the manifest {static path: fingerprinted path} to output, returns
+    the manifest. files of earlier builds are kept for pages still linking
+    them
+    """
+    sources = sorted(
+        posixpath.relpath(os.path.join(root, name), static_folder).replace(
+            os.sep, "/"
+        )
+        for root, _, names in os.walk(static_folder)
+        for name in names
+    )
+    # referenced files first so their names are known when rewriting
+    sources.sort(key=lambda source: posixpath.splitext(source)[1] in REWRITTEN)
+    compressors = _compressors()
+    manifest = {}
+    for source in sources:
+        with open(os.path.join(static_folder, source), "rb") as file:
+            content = file.read()
+        extension = posixpath.splitext(source)[1]
+        if extension in REWRITTEN:
+            content = _rewrite(source, content, manifest)
+        manifest[source] = fingerprint(source, content)
+        path = os.path.join(output, manifest[source])
+        _write(path, content)
+        if extension in COMPRESSIBLE:
+            for suffix, compress in compressors:
+                if len(compressed := compress(content)) < len(content):
+                    _write(path + suffix, compressed)
+    _write(
+        os.path.join(output, MANIFEST),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+    return manifest
+
+
+def asset_url(filename):
+    """
+    returns the URL of the fingerprinted static file filename, or of the
+    static file itself if assets weren't built
+    """
+    if hashed := current_app.extensions["assets"].get(filename):
+        return url_for("assets", filename=hashed)
+    return url_for("static", filename=filename)
+
+
+def send_asset(filename):
+    """
+    sends a fingerprinted file, its brotli or gzip variant if the client
+    accepts it, to be cached for good
+    """
+    directory = current_app.config["ASSETS_DIR"]
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encoding, suffix = None, ""
+    for name, variant in (("br", ".br"), ("gzip", ".gz")):
+        if request.accept_encodings[name] and os.path.isfile(
+            os.path.join(directory, filename + variant)
+        ):
+            encoding, suffix = name, variant
+            break
+    response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    """
+    loads the manifest of the last build and registers the /assets route
+    and asset_url()
+    """
+    try:
+        with open(os.path.join(app.config["ASSETS_DIR"], MANIFEST)) as file:
+            app.extensions["assets"] = json.load(file)
+    except FileNotFoundError:
+        app.extensions["assets"] = {}
+    app.add_url_rule("/assets/<path:filename>", "assets", send_asset)
+    app.add_template_global(asset_url)
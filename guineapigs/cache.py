@@ -0,0 +1,267 @@
+"""
+    small in-process caches shared by the views of a worker
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+
+_MISSING = object()
+
+
+class Cache:
+    """
+    base class of the caches, subclasses implement get and set
+    """
+
+    def get(self, key, default=None):
+        """
+        returns cached value for key or default if missing
+        """
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """
+        caches value for key
+        """
+        raise NotImplementedError
+
+    def get_or_set(self, key, factory):
+        """
+        returns cached value for key, calling factory to compute it on a miss
+        """
+        if (value := self.get(key, _MISSING)) is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+
+class TTLCache(Cache):
+    """
+    LRU cache whose entries also expire ttl seconds after being set.
+    size and ttl are read from {config_prefix}_SIZE and {config_prefix}_TTL
+    """
+
+    def __init__(self, config_prefix, maxsize=128, ttl=60):
+        self.config_prefix = config_prefix
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, flask_app):
+        """
+        reads cache size and ttl from flask_app config
+        """
+        config = flask_app.config
+        self.maxsize = config.get(f"{self.config_prefix}_SIZE", self.maxsize)
+        self.ttl = config.get(f"{self.config_prefix}_TTL", self.ttl)
+        self.clear()
+
+    def get(self, key, default=None):
+        """
+        returns cached value for key or default if missing or expired
+        """
+        with self._lock:
+            if key in self._entries:
+                expires, value = self._entries[key]
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        caches value for key, evicting the least recently used entry if full
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """
+        removes key from the cache if present
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        removes every entry and bumps the cache version
+        """
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+
+    def stats(self):
+        """
+        returns {hits, misses, size, version} counters of this cache
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "version": self.version,
+        }
+
+
+class FileCache(Cache):
+    """
+    LRU cache of str values kept as files in {config_prefix}_DIR, shared by
+    every worker on the host. recency is tracked with file modification
+    times and files beyond {config_prefix}_SIZE are evicted on set
+    """
+
+    def __init__(self, config_prefix, maxsize=256, directory=None):
+        self.config_prefix = config_prefix
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+
+    def init_app(self, flask_app):
+        """
+        reads cache size and directory from flask_app config
+        """
+        config = flask_app.config
+        self.maxsize = config.get(f"{self.config_prefix}_SIZE", self.maxsize)
+        self.directory = config.get(f"{self.config_prefix}_DIR", self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha1(repr(key).encode()).hexdigest()
+        )
+
+    def _files(self):
+        with os.scandir(self.directory) as entries:
+            return [
+                entry
+                for entry in entries
+                if entry.is_file() and not entry.name.startswith(".")
+            ]
+
+    def get(self, key, default=None):
+        """
+        returns cached value for key or default if missing
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as file:
+                value = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        caches value for key, evicting the least recently used files if full
+        """
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, prefix=".", delete=False
+        ) as file:
+            file.write(value)
+        os.replace(file.name, self._path(key))
+
+        files = self._files()
+        if len(files) > self.maxsize:
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in files[: len(files) - self.maxsize]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """
+        removes every file and bumps the cache version
+        """
+        for entry in self._files():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        self.version += 1
+
+    def stats(self):
+        """
+        returns {hits, misses, size, version} counters of this cache
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._files()),
+            "version": self.version,
+        }
+
+
+class PageCache(Cache):
+    """
+    cache of rendered pages whose backend is set by PAGE_CACHE_BACKEND:
+    "memory" (LRU per worker), "filesystem" (LRU files shared by workers)
+    or "none"
+    """
+
+    backends = {
+        "memory": lambda: TTLCache("PAGE_CACHE", maxsize=256, ttl=3600),
+        "filesystem": lambda: FileCache("PAGE_CACHE"),
+    }
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, flask_app):
+        """
+        creates the configured backend
+        """
+        name = flask_app.config.get("PAGE_CACHE_BACKEND", "memory")
+        self.backend = self.backends[name]() if name != "none" else None
+        if self.backend:
+            self.backend.init_app(flask_app)
+
+    def get(self, key, default=None):
+        """
+        returns cached page for key or default if missing
+        """
+        return self.backend.get(key, default) if self.backend else default
+
+    def set(self, key, value):
+        """
+        caches page for key
+        """
+        if self.backend:
+            self.backend.set(key, value)
+
+    def clear(self):
+        """
+        removes every page
+        """
+        if self.backend:
+            self.backend.clear()
+
+    def stats(self):
+        """
+        returns {hits, misses, size, version} counters of the backend
+        """
+        if self.backend:
+            return self.backend.stats()
+        return {"hits": 0, "misses": 0, "size": 0, "version": 0}
+
+
+user_cache = TTLCache("USER_CACHE", maxsize=1024, ttl=300)
+reference_cache = TTLCache("REFERENCE_CACHE", maxsize=16, ttl=60)
+page_cache = PageCache()
@@ -0,0 +1,142 @@
+"""
+    flask cli commands for importing data, maintaining derived tables and
+    partitions and building static assets
+"""
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from guineapigs import assets, importer, models, partitions
+from guineapigs.extensions import db
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets():
+    """
+    Writes fingerprinted and precompressed copies of the static files to
+    ASSETS_DIR, run on every deploy before starting the app
+    """
+    output = current_app.config["ASSETS_DIR"]
+    manifest = assets.build(current_app.static_folder, output)
+    click.echo(f"built {len(manifest)} assets in {output}")
+
+
+@click.command("rebuild-statistics")
+@with_appcontext
+def rebuild_statistics():
+    """
+    Recomputes the food statistics and the food and weight rollup tables
+    from entries
+    """
+    models.FoodStatistic.rebuild()
+    models.FoodRollup.refresh()
+    models.WeightRollup.rebuild()
+    # pages and ETags cached under the entry versions showed the old counts
+    models.DataVersion.bump("food_entry", "weight_entry")
+    db.session.commit()  # pylint: disable=no-member
+    click.echo("food statistics and food and weight rollups rebuilt")
+
+
+@click.command("rebuild-food-rollup")
+@click.option("--start", type=click.DateTime(["%Y-%m-%d"]), help="first local day")
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), help="last local day")
+@with_appcontext
+def rebuild_food_rollup(start, end):
+    """
+    Recomputes the daily food rollup from food entries, for every day or
+    only the days from start to end
+    """
+    models.FoodRollup.refresh(start and start.date(), end and end.date())
+    models.DataVersion.bump("food_entry")
+    db.session.commit()  # pylint: disable=no-member
+    click.echo("food rollup rebuilt")
+
+
+@click.command("import-entries")
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["csv", "ndjson"]),
+    help="defaults to the file extension",
+)
+@click.option("--user", help="name of the user of rows without one")
+@click.option("--chunk-size", default=1000, show_default=True)
+@with_appcontext
+def import_entries(file, format_, user, chunk_size):
+    """
+    Imports food and weight entries from a CSV or NDJSON file
+    """
+    format_ = format_ or os.path.splitext(file.name)[1].lstrip(".")
+    user_id = None
+    if user:
+        if not (found := models.User.query.filter(models.User.name == user).first()):
+            raise click.BadParameter(f"no user named {user!r}", param_hint="--user")
+        user_id = found.id
+    try:
+        result = importer.import_entries(
+            importer.read_rows(file, format_), user_id, chunk_size
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    click.echo(
+        f"imported {result.food_entries} food, {result.weight_entries} weight and "
+        f"{result.vitamin_c_entries} vitamin c entries ({result.skipped} skipped) "
+        f"in {result.seconds:.2f}s, {result.rows_per_second:.0f} rows/s"
+    )
+
+
+@click.group("partitions")
+def manage_partitions():
+    """
+    Manages the PostgreSQL partitions of entry tables
+    """
+
+
+def _partition_period():
+    period = current_app.config["ENTRY_PARTITION_PERIOD"]
+    if db.engine.dialect.name != "postgresql" or period not in partitions.PERIODS:
+        raise click.ClickException(
+            "entry tables are only partitioned on PostgreSQL with "
+            "ENTRY_PARTITION_PERIOD set to month or year"
+        )
+    return period
+
+
+@manage_partitions.command("ensure")
+@click.option("--ahead", type=int, help="defaults to ENTRY_PARTITIONS_AHEAD")
+@with_appcontext
+def ensure_partitions(ahead):
+    """
+    Creates the partitions of the current and coming periods, run it daily
+    """
+    period = _partition_period()
+    if ahead is None:
+        ahead = current_app.config["ENTRY_PARTITIONS_AHEAD"]
+    with db.engine.begin() as connection:
+        created = partitions.ensure(connection, period, ahead)
+    click.echo(f"created {', '.join(created)}" if created else "nothing to create")
+
+
+@manage_partitions.command("detach")
+@click.option(
+    "--before",
+    type=click.DateTime(["%Y-%m-%d"]),
+    required=True,
+    help="detach partitions ending on or before this day",
+)
+@click.option("--drop", is_flag=True, help="drop the detached partitions")
+@with_appcontext
+def detach_partitions(before, drop):
+    """
+    Detaches (and optionally drops) partitions of old entries. rollups and
+    food statistics keep counting their rows until rebuilt
+    """
+    _partition_period()
+    with db.engine.begin() as connection:
+        detached = partitions.detach(connection, before.date(), drop)
+        if detached:
+            models.DataVersion.bump(*partitions.TABLES, connection=connection)
+    action = "dropped" if drop else "detached"
+    click.echo(f"{action} {', '.join(detached)}" if detached else "nothing to detach")
@@ -0,0 +1,179 @@
+"""
+    gzip (or brotli, if the brotli module is installed) compression of
+    responses, on the fly for streamed ones
+
+    streamed pages (history, exports) are compressed chunk by chunk as they
+    are rendered, flushing the compressor after the first chunk (so the
+    browser gets the head of the page, and its stylesheets, right away) and
+    then every COMPRESS_FLUSH_SIZE bytes of page, so neither the page nor
+    its compressed copy is ever held whole in memory
+"""
+import zlib
+from flask import current_app, request
+
+# text/event-stream is left out, every event has to reach the browser
+COMPRESSIBLE = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+class _Gzip:
+    """
+    streaming gzip compressor
+    """
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data):
+        """
+        returns the compressed data that's ready, keeps the rest buffered
+        """
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """
+        returns everything buffered so far, the stream goes on
+        """
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """
+        returns the end of the stream
+        """
+        return self._compressor.flush()
+
+
+class _Brotli:
+    """
+    streaming brotli compressor
+    """
+
+    def __init__(self, brotli, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        """
+        returns the compressed data that's ready, keeps the rest buffered
+        """
+        return self._compressor.process(data)
+
+    def flush(self):
+        """
+        returns everything buffered so far, the stream goes on
+        """
+        return self._compressor.flush()
+
+    def finish(self):
+        """
+        returns the end of the stream
+        """
+        return self._compressor.finish()
+
+
+def _stream(chunks, compressor, flush_size):
+    """
+    compresses the chunks of a streamed response as they come
+    """
+    first, pending = True, 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if first or pending >= flush_size:
+            data += compressor.flush()
+            first, pending = False, 0
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compression:
+    """
+    compresses responses to clients accepting it, set COMPRESS_RESPONSES=0
+    to leave it to a proxy
+    """
+
+    def __init__(self):
+        self.encodings = {}
+
+    def init_app(self, flask_app):
+        """
+        registers the compression of every response when enabled
+        """
+        if not flask_app.config["COMPRESS_RESPONSES"]:
+            return
+        level = flask_app.config["COMPRESS_LEVEL"]
+        self.encodings = {"gzip": lambda: _Gzip(level)}
+        try:
+            import brotli  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            pass
+        else:
+            quality = flask_app.config["COMPRESS_BROTLI_QUALITY"]
+            self.encodings = {"br": lambda: _Brotli(brotli, quality), **self.encodings}
+        flask_app.after_request(self.compress)
+
+    def _encoding(self):
+        """
+        returns the preferred encoding the client accepts, None if none
+        """
+        accepted = request.accept_encodings
+        for encoding in self.encodings:
+            if accepted[encoding]:
+                return encoding
+        return None
+
+    def compress(self, response):
+        """
+        compresses response if it's text worth compressing
+        """
+        if response.status_code == 304:
+            # the validator the client holds is weak if its body was compressed
+            etag, weak = response.get_etag()
+            if etag and not weak and request.if_none_match.is_weak(etag):
+                response.set_etag(etag, weak=True)
+            return response
+        if (
+            response.mimetype not in COMPRESSIBLE
+            or response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if not (encoding := self._encoding()):
+            return response
+        compressor = self.encodings[encoding]()
+        if response.is_streamed:
+            # the page generator is closed with the response, even if the
+            # client went away before the end
+            if hasattr(response.response, "close"):
+                response.call_on_close(response.response.close)
+            response.response = _stream(
+                response.iter_encoded(),
+                compressor,
+                current_app.config["COMPRESS_FLUSH_SIZE"],
+            )
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+                return response
+            response.set_data(compressor.compress(data) + compressor.finish())
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # a strong ETag names the identity body, the compressed one is
+            # another representation of it (as nginx weakens it)
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
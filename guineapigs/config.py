@@ -2,6 +2,7 @@
     loads configuration variables and default ones
 """
 import os
+import tempfile
 import pytz
 
 
@@ -21,6 +22,41 @@ class Config:  # pylint: disable=too-few-public-methods
     REMEMBER_COOKIE_DURATION = os.environ.get(
         "REMEMBER_COOKIE_DURATION365", 365 * 24 * 60 * 60
     )
+    SQLALCHEMY_REPLICA_URI = os.environ.get("SQLALCHEMY_REPLICA_URI")
+    REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5))
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+    DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "0") == "1"
+    ENTRY_PARTITION_PERIOD = os.environ.get("ENTRY_PARTITION_PERIOD")
+    ENTRY_PARTITIONS_AHEAD = int(os.environ.get("ENTRY_PARTITIONS_AHEAD", 3))
+    HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", 100))
+    USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 300))
+    REFERENCE_CACHE_TTL = int(os.environ.get("REFERENCE_CACHE_TTL", 60))
+    PAGE_CACHE_BACKEND = os.environ.get("PAGE_CACHE_BACKEND", "memory")
+    PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 256))
+    PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 3600))
+    PAGE_CACHE_DIR = os.environ.get(
+        "PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "guineapigs-pages")
+    )
+    EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "local")
+    EVENTS_LISTEN_URI = os.environ.get("EVENTS_LISTEN_URI")
+    EVENTS_KEEPALIVE = int(os.environ.get("EVENTS_KEEPALIVE", 15))
+    EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", 4))
+    EVENTS_STREAM_TIMEOUT = int(os.environ.get("EVENTS_STREAM_TIMEOUT", 300))
+    ASSETS_DIR = os.environ.get(
+        "ASSETS_DIR", os.path.join(os.path.dirname(__file__), "dist")
+    )
+    COMPRESS_RESPONSES = os.environ.get("COMPRESS_RESPONSES", "1") == "1"
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 4))
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    COMPRESS_FLUSH_SIZE = int(os.environ.get("COMPRESS_FLUSH_SIZE", 16384))
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
     SECRET_KEY = os.environ.get("SECRET_KEY", "super secret")
     NAV_PAGES_LOGGED_IN = (
         ("dashboard", "private.dashboard",),
@@ -0,0 +1,163 @@
+"""
+    server-sent events pushing dashboard changes to connected clients
+
+    events are published during a write and delivered once it commits:
+    in process ("local", only clients of the same worker) or through
+    PostgreSQL NOTIFY and a LISTEN thread in every worker ("postgresql").
+    each open stream keeps a worker thread busy, so serve with threaded
+    or async gunicorn workers. a worker serves at most EVENTS_MAX_STREAMS
+    streams at once, for EVENTS_STREAM_TIMEOUT seconds each (browsers
+    reconnect), and tells the browsers of any more to retry later
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+from guineapigs.extensions import db
+
+CHANNEL = "guineapigs_events"
+# milliseconds browsers wait before reconnecting, and when a worker is full
+RETRY = 5000
+BUSY_RETRY = 30000
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """
+    fans events out to the streams connected to this worker
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def dispatch(self, data):
+        """
+        queues JSON encoded event data on every stream, dropping streams
+        that stopped reading
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(data)
+            except queue.Full:
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+
+    @contextmanager
+    def subscribe(self, limit=None):
+        """
+        yields a queue receiving the data of every event until closed, or
+        None if limit queues are subscribed already
+        """
+        subscriber = queue.Queue(self.maxsize)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                subscriber = None
+            else:
+                self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def listen(self, uri):
+        """
+        starts the thread relaying NOTIFYs on CHANNEL to dispatch, once
+        """
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, args=(uri,), name="events", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self, uri):
+        engine = create_engine(uri, poolclass=NullPool)
+        while True:
+            try:
+                connection = engine.raw_connection()
+                try:
+                    dbapi_connection = connection.connection
+                    dbapi_connection.autocommit = True
+                    dbapi_connection.cursor().execute(f"LISTEN {CHANNEL}")
+                    while True:
+                        if select.select([dbapi_connection], [], [], 60)[0]:
+                            dbapi_connection.poll()
+                            while dbapi_connection.notifies:
+                                self.dispatch(dbapi_connection.notifies.pop(0).payload)
+                finally:
+                    connection.close()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("lost events connection, reconnecting")
+                time.sleep(5)
+
+
+broker = Broker()
+
+
+def publish(type_, **data):
+    """
+    sends an event to every stream once the current transaction commits
+    """
+    payload = json.dumps({"type": type_, **data})
+    if current_app.config["EVENTS_BACKEND"] == "postgresql":
+        db.session.execute(  # pylint: disable=no-member
+            db.select([db.func.pg_notify(CHANNEL, payload)])
+        )
+    else:
+        db.session.info.setdefault("events", []).append(payload)
+
+
+@event.listens_for(db.session, "after_commit")
+def _dispatch_published(session):
+    for payload in session.info.pop("events", []):
+        broker.dispatch(payload)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_published(session):
+    session.info.pop("events", None)
+
+
+def stream():
+    """
+    yields server-sent events (and keep-alive comments) for
+    EVENTS_STREAM_TIMEOUT seconds, meant to be the body of a
+    text/event-stream response. ends right away, asking the browser to
+    retry later, when the worker has EVENTS_MAX_STREAMS streams open
+    """
+    config = current_app.config
+    if config["EVENTS_BACKEND"] == "postgresql":
+        broker.listen(config["EVENTS_LISTEN_URI"] or config["SQLALCHEMY_DATABASE_URI"])
+    keepalive = config["EVENTS_KEEPALIVE"]
+    timeout = config["EVENTS_STREAM_TIMEOUT"]
+    limit = config["EVENTS_MAX_STREAMS"]
+
+    def generate():
+        with broker.subscribe(limit) as subscriber:
+            if subscriber is None:
+                yield f"retry: {BUSY_RETRY}\n\n"
+                return
+            yield f"retry: {RETRY}\n\n"
+            deadline = time.monotonic() + timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    data = subscriber.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"data: {data}\n\n"
+
+    return generate()
@@ -3,10 +3,8 @@
 """
 from flask_bootstrap import Bootstrap
 from flask_login import LoginManager
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
+from guineapigs.replica import RoutingSQLAlchemy
 
 bootstrap = Bootstrap()
 login_manager = LoginManager()
-db = SQLAlchemy()
-migrate = Migrate()
+db = RoutingSQLAlchemy()
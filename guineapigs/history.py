@@ -0,0 +1,191 @@
+"""
+    history of food, weight and vitamin c entries as one query
+"""
+import csv
+import io
+import itertools
+import json
+from collections import namedtuple
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from guineapigs import models
+from guineapigs.extensions import db
+from guineapigs.utils import encode_cursor
+
+HistoryRow = namedtuple(
+    "HistoryRow", ("utc_date", "id", "kind", "value", "guinea_pigs", "user", "notes")
+)
+
+
+class group_concat(GenericFunction):  # pylint: disable=invalid-name,too-many-ancestors
+    """
+    concatenates values of a group separated by the second argument
+    (group_concat in SQLite, string_agg in PostgreSQL)
+    """
+
+    type = db.String()
+
+
+@compiles(group_concat, "postgresql")
+def _string_agg(element, compiler, **kwargs):
+    return f"string_agg({compiler.process(element.clauses, **kwargs)})"
+
+
+def _food_entries(start, end, before, limit):
+    page = models.FoodEntry.get_page(start, end, before, limit).subquery()
+    return (
+        db.select(
+            [
+                page.c.utc_date,
+                page.c.id,
+                db.literal_column("'food'", db.String).label("kind"),
+                models.FoodType.label.label("value"),
+                group_concat(models.GuineaPig.name, ", ").label("guinea_pigs"),
+                models.User.name.label("user"),
+                page.c.notes,
+            ]
+        )
+        .select_from(
+            page.join(models.FoodType, models.FoodType.id == page.c.food_type_id)
+            .outerjoin(models.User, models.User.id == page.c.user_id)
+            .outerjoin(
+                models.food_entries, models.food_entries.c.food_entry_id == page.c.id
+            )
+            .outerjoin(
+                models.GuineaPig,
+                models.GuineaPig.id == models.food_entries.c.guinea_pig_id,
+            )
+        )
+        .group_by(
+            page.c.utc_date,
+            page.c.id,
+            page.c.notes,
+            models.FoodType.label,
+            models.User.name,
+        )
+    )
+
+
+def _weight_entries(start, end, before, limit):
+    page = models.WeightEntry.get_page(start, end, before, limit).subquery()
+    return db.select(
+        [
+            page.c.utc_date,
+            page.c.id,
+            db.literal_column("'weight'", db.String).label("kind"),
+            db.cast(page.c.value, db.String).label("value"),
+            models.GuineaPig.name.label("guinea_pigs"),
+            models.User.name.label("user"),
+            db.literal_column("NULL", db.String).label("notes"),
+        ]
+    ).select_from(
+        page.join(models.GuineaPig, models.GuineaPig.id == page.c.guinea_pig_id)
+        .outerjoin(models.User, models.User.id == page.c.user_id)
+    )
+
+
+def _vitamin_c_entries(start, end, before, limit):
+    page = models.VitaminCEntry.get_page(start, end, before, limit).subquery()
+    return db.select(
+        [
+            page.c.utc_date,
+            page.c.id,
+            db.literal_column("'vitamin c'", db.String).label("kind"),
+            db.literal_column("''", db.String).label("value"),
+            db.literal_column("''", db.String).label("guinea_pigs"),
+            models.User.name.label("user"),
+            db.literal_column("NULL", db.String).label("notes"),
+        ]
+    ).select_from(page.outerjoin(models.User, models.User.id == page.c.user_id))
+
+
+def _query(start, end, before=None, limit=None):
+    union = db.union_all(
+        _food_entries(start, end, before, limit),
+        _weight_entries(start, end, before, limit),
+        _vitamin_c_entries(start, end, before, limit),
+    ).alias("history")
+    return (
+        db.select([union])
+        .order_by(union.c.utc_date.desc(), union.c.id.desc(), union.c.kind.desc())
+        .limit(limit)
+    )
+
+
+def get_page(start, end, before=None, limit=None):
+    """
+    yields HistoryRows in time range, newest first, that come after the
+    (utc_date, id, kind) cursor `before`. each entry table is limited on its
+    own so the database never reads more than `limit` rows per table
+    """
+    query = _query(start, end, before, limit)
+    for row in db.session.execute(query):  # pylint: disable=no-member
+        yield HistoryRow._make(row)
+
+
+def paginate(start, end, before=None, limit=100):
+    """
+    returns ([HistoryRow], cursor of the next page or None) of one page
+    """
+    rows = list(get_page(start, end, before, limit + 1))
+    if len(rows) > limit:
+        rows.pop()
+        return rows, encode_cursor(rows[-1].utc_date, rows[-1].id, rows[-1].kind)
+    return rows, None
+
+
+def get_all(start, end):
+    """
+    yields every HistoryRow in time range, newest first, fetching rows in
+    batches from a server side cursor so memory use doesn't grow with range
+    """
+    query = _query(start, end).execution_options(stream_results=True)
+    for row in db.session.execute(query):  # pylint: disable=no-member
+        yield HistoryRow._make(row)
+
+
+def serialize(row):
+    """
+    returns row with its date as an ISO 8601 string
+    """
+    return row._replace(utc_date=row.utc_date.isoformat())
+
+
+def _chunks(lines, chunk_size):
+    """
+    joins lines into chunks of chunk_size lines to keep response writes few
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield "".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield "".join(chunk)
+
+
+def to_csv(rows, chunk_size=500):
+    """
+    yields rows as CSV text, header first, chunk_size rows at a time
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def lines():
+        for row in itertools.chain([HistoryRow._fields], map(serialize, rows)):
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    return _chunks(lines(), chunk_size)
+
+
+def to_ndjson(rows, chunk_size=500):
+    """
+    yields rows as newline delimited JSON objects, chunk_size rows at a time
+    """
+    return _chunks(
+        (json.dumps(serialize(row)._asdict()) + "\n" for row in rows), chunk_size
+    )
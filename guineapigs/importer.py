@@ -0,0 +1,292 @@
+"""
+    bulk import of food and weight entries from CSV or NDJSON
+
+    rows use the columns of the history export: utc_date (ISO 8601, UTC if
+    no offset is given), kind ("food", "weight" or "vitamin c"), value (food
+    type label or weight), guinea_pigs (comma separated names), user (name,
+    optional) and notes (optional, food only). other kinds are skipped, and
+    so are vitamin c entries of days that have one already
+"""
+import csv
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+import pytz
+from guineapigs import models
+from guineapigs.extensions import db
+from guineapigs.utils import to_local_date
+
+
+class InvalidRow(ValueError):
+    """
+    raised when a row can't be imported, rows before it are already committed
+    """
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class ImportResult:  # pylint: disable=too-few-public-methods
+    """
+    number of rows imported and how long it took
+    """
+
+    def __init__(self):
+        self.food_entries = 0
+        self.weight_entries = 0
+        self.vitamin_c_entries = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        """
+        imported entries per second
+        """
+        rows = self.food_entries + self.weight_entries + self.vitamin_c_entries
+        return rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        """
+        returns the counters as a dict (for JSON responses)
+        """
+        return {
+            "food_entries": self.food_entries,
+            "weight_entries": self.weight_entries,
+            "vitamin_c_entries": self.vitamin_c_entries,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def read_rows(lines, format_):
+    """
+    yields (line number, row dict) from an iterable of text lines
+    """
+    if format_ == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif format_ == "ndjson":
+        for line_number, line in enumerate(lines, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as error:
+                    raise InvalidRow(line_number, "invalid JSON") from error
+    else:
+        raise ValueError(f"unsupported format {format_!r}")
+
+
+def _parse_date(line, value):
+    try:
+        utc_date = datetime.fromisoformat(str(value))
+    except ValueError as error:
+        raise InvalidRow(line, f"invalid utc_date {value!r}") from error
+    if utc_date.tzinfo:
+        utc_date = utc_date.astimezone(pytz.utc).replace(tzinfo=None)
+    return utc_date
+
+
+def _names(value):
+    return [name.strip() for name in str(value or "").split(",") if name.strip()]
+
+
+class _Resolver:
+    """
+    maps food type labels, guinea pig names and user names to ids, loading
+    each table once and creating missing users in bulk
+    """
+
+    def __init__(self):
+        self.food_types = {row.label: row.id for row in models.FoodType.get_all()}
+        self.guinea_pigs = {row.name: row.id for row in models.GuineaPig.get_all()}
+        self.users = dict(
+            db.session.query(  # pylint: disable=no-member
+                models.User.name, models.User.id
+            )
+        )
+
+    def food_type(self, line, label):
+        """
+        returns id of food type label
+        """
+        if label not in self.food_types:
+            raise InvalidRow(line, f"unknown food type {label!r}")
+        return self.food_types[label]
+
+    def guinea_pig(self, line, name):
+        """
+        returns id of guinea pig name
+        """
+        if name not in self.guinea_pigs:
+            raise InvalidRow(line, f"unknown guinea pig {name!r}")
+        return self.guinea_pigs[name]
+
+    def create_users(self, names):
+        """
+        inserts users that don't exist yet
+        """
+        if missing := sorted(set(names) - set(self.users)):
+            db.session.execute(  # pylint: disable=no-member
+                models.User.__table__.insert(), [{"name": name} for name in missing]
+            )
+            models.DataVersion.bump("user")
+            self.users.update(
+                db.session.query(  # pylint: disable=no-member
+                    models.User.name, models.User.id
+                ).filter(models.User.name.in_(missing))
+            )
+
+
+def _allocate_food_entry_ids(count):
+    """
+    reserves count ids from the food_entry sequence (postgres only)
+    """
+    return [
+        row[0]
+        for row in db.session.execute(  # pylint: disable=no-member
+            db.text(
+                "SELECT nextval(pg_get_serial_sequence('food_entry', 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"count": count},
+        )
+    ]
+
+
+def _insert_food_entries(food_entries):
+    """
+    inserts [(row, [guinea pig ids])], with one executemany per table on
+    postgres (ids are reserved up front) and one insert per row elsewhere
+    """
+    table = models.FoodEntry.__table__
+    if db.engine.dialect.name == "postgresql":
+        for (row, _), id_ in zip(
+            food_entries, _allocate_food_entry_ids(len(food_entries))
+        ):
+            row["id"] = id_
+        db.session.execute(  # pylint: disable=no-member
+            table.insert(), [row for row, _ in food_entries]
+        )
+    else:
+        for row, _ in food_entries:
+            row["id"] = db.session.execute(  # pylint: disable=no-member
+                table.insert(), row
+            ).inserted_primary_key[0]
+
+    if associations := [
+        {"food_entry_id": row["id"], "guinea_pig_id": guinea_pig_id}
+        for row, guinea_pig_ids in food_entries
+        for guinea_pig_id in guinea_pig_ids
+    ]:
+        db.session.execute(  # pylint: disable=no-member
+            models.food_entries.insert(), associations
+        )
+
+
+def _count_food_entries(rows):
+    """
+    adds food entry rows to the food statistics, one update per food type
+    """
+    counts, latest = Counter(), {}
+    for row in rows:
+        food_type_id, utc_date = row["food_type_id"], row["utc_date"]
+        counts[food_type_id] += 1
+        latest[food_type_id] = max(latest.get(food_type_id, utc_date), utc_date)
+    for food_type_id, count in counts.items():
+        models.FoodStatistic.add_entry(food_type_id, latest[food_type_id], count)
+
+
+def _import_chunk(chunk, resolver, default_user_id, result):
+    """
+    inserts and commits one chunk of rows with the statistics and rollups
+    of its entries
+    """
+    food_entries, weight_entries, vitamin_c_entries = [], [], []
+    resolver.create_users(row["user"] for _, row in chunk if row.get("user"))
+    for line, row in chunk:
+        kind = row.get("kind")
+        if kind not in ("food", "weight", "vitamin c"):
+            result.skipped += 1
+            continue
+        entry = {
+            "utc_date": _parse_date(line, row.get("utc_date")),
+            "user_id": resolver.users.get(row.get("user"), default_user_id),
+        }
+        if kind == "vitamin c":
+            entry["local_day"] = to_local_date(entry["utc_date"])
+            vitamin_c_entries.append(entry)
+        elif kind == "food":
+            entry["food_type_id"] = resolver.food_type(line, row.get("value"))
+            entry["notes"] = row.get("notes") or None
+            guinea_pig_ids = {
+                resolver.guinea_pig(line, name)
+                for name in _names(row.get("guinea_pigs"))
+            }
+            food_entries.append((entry, guinea_pig_ids))
+        else:
+            try:
+                entry["value"] = float(row.get("value"))
+            except (TypeError, ValueError) as error:
+                message = f"invalid weight {row.get('value')!r}"
+                raise InvalidRow(line, message) from error
+            entry["guinea_pig_id"] = resolver.guinea_pig(line, row.get("guinea_pigs"))
+            weight_entries.append(entry)
+
+    if food_entries:
+        _insert_food_entries(food_entries)
+        # only the days of the chunk, an unsorted file spans years per chunk
+        models.FoodRollup.refresh_days(
+            {to_local_date(row["utc_date"]) for row, _ in food_entries},
+            {row["food_type_id"] for row, _ in food_entries},
+        )
+        _count_food_entries(row for row, _ in food_entries)
+        models.DataVersion.bump("food_entry")
+    if weight_entries:
+        db.session.execute(  # pylint: disable=no-member
+            models.WeightEntry.__table__.insert(), weight_entries
+        )
+        models.WeightRollup.refresh(
+            {
+                (entry["guinea_pig_id"], to_local_date(entry["utc_date"]))
+                for entry in weight_entries
+            }
+        )
+        models.DataVersion.bump("weight_entry")
+    inserted = 0
+    if vitamin_c_entries:
+        # days that have an entry already (or twice in the file) keep the first
+        inserted = db.session.execute(  # pylint: disable=no-member
+            models.VitaminCEntry.insert_unless_taken(), vitamin_c_entries
+        ).rowcount
+        if inserted:
+            models.DataVersion.bump("vitamin_c_entry")
+    db.session.commit()  # pylint: disable=no-member
+    result.food_entries += len(food_entries)
+    result.weight_entries += len(weight_entries)
+    result.vitamin_c_entries += inserted
+    result.skipped += len(vitamin_c_entries) - inserted
+
+
+def import_entries(rows, default_user_id=None, chunk_size=1000):
+    """
+    imports (line number, row dict) pairs chunk_size rows per transaction,
+    returns an ImportResult. raises InvalidRow at the first bad row, after
+    rolling back its chunk
+    """
+    result = ImportResult()
+    resolver = _Resolver()
+    start = time.perf_counter()
+    rows = iter(rows)
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            _import_chunk(chunk, resolver, default_user_id, result)
+    finally:
+        db.session.rollback()  # pylint: disable=no-member
+        result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,312 @@
+"""
+    per endpoint request, SQL and template metrics in Prometheus text format
+
+    metrics live in the worker process, so every gunicorn worker exposes its
+    own values on /metrics (scrape each worker or sum them in Prometheus)
+"""
+import hmac
+import time
+from collections import defaultdict
+from threading import Lock
+from flask import (
+    abort,
+    Blueprint,
+    before_render_template,
+    current_app,
+    g,
+    has_app_context,
+    request,
+    request_finished,
+    request_started,
+    Response,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from guineapigs.cache import page_cache, reference_cache, user_cache
+from guineapigs.extensions import db
+
+blueprint = Blueprint("metrics", __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+class Histogram:
+    """
+    cumulative histogram with one series per combination of label values
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * len(self.buckets), 0.0, 0])
+        self._lock = Lock()
+
+    def observe(self, value, *label_values):
+        """
+        records value in the series of label_values
+        """
+        with self._lock:
+            series = self._series[label_values]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        """
+        yields (suffix, {label: value}, sample) for the text exposition
+        """
+        with self._lock:
+            series = {key: (list(b), s, c) for key, (b, s, c) in self._series.items()}
+        for label_values, (buckets, total, count) in sorted(series.items()):
+            labels = dict(zip(self.labels, label_values))
+            for bound, bucket in zip(self.buckets, buckets):
+                yield "_bucket", {**labels, "le": str(bound)}, bucket
+            yield "_bucket", {**labels, "le": "+Inf"}, count
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+class Counter:
+    """
+    counter without labels
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        """
+        adds amount to the counter
+        """
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        """
+        yields (suffix, {label: value}, sample) for the text exposition
+        """
+        yield "", {}, self.value
+
+
+class PoolGauge:
+    """
+    exposes the connection counts of the app's QueuePool, read when scraped
+    """
+
+    kind = "gauge"
+    states = {
+        "size": "size",
+        "checked_in": "checkedin",
+        "checked_out": "checkedout",
+        "overflow": "overflow",
+    }
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def samples(self):
+        """
+        yields (suffix, {label: value}, sample) for the text exposition
+        """
+        if not has_app_context():
+            return
+        pool = db.engine.pool
+        for state, method in self.states.items():
+            if hasattr(pool, method):
+                yield "", {"state": state}, getattr(pool, method)()
+
+
+class CacheCounter:
+    """
+    exposes a counter of the guineapigs.cache caches, read when scraped
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, description, stat, caches):
+        self.name = name
+        self.description = description
+        self.stat = stat
+        self.caches = caches
+
+    def samples(self):
+        """
+        yields (suffix, {label: value}, sample) for the text exposition
+        """
+        for label, cache in self.caches.items():
+            yield "", {"cache": label}, cache.stats()[self.stat]
+
+
+CACHES = {"user": user_cache, "reference": reference_cache, "page": page_cache}
+
+REQUEST_DURATION = Histogram(
+    "guineapigs_request_duration_seconds",
+    "Time from request start until the response body was sent",
+    ("endpoint", "method", "status"),
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "guineapigs_request_sql_queries",
+    "SQL statements executed per request",
+    ("endpoint",),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    "guineapigs_request_sql_duration_seconds",
+    "Time spent executing SQL statements per request",
+    ("endpoint",),
+)
+TEMPLATE_RENDER_DURATION = Histogram(
+    "guineapigs_template_render_seconds",
+    "Time spent rendering each template",
+    ("template",),
+)
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "guineapigs_db_pool_checkout_seconds",
+    "Time to check out a database connection (waiting, connecting, pre-ping)",
+    (),
+    CHECKOUT_BUCKETS,
+)
+DB_CONNECTIONS_OPENED = Counter(
+    "guineapigs_db_connections_opened_total", "Database connections opened"
+)
+DB_POOL_CONNECTIONS = PoolGauge(
+    "guineapigs_db_pool_connections", "Connections of the pool by state"
+)
+METRICS = (
+    REQUEST_DURATION,
+    REQUEST_SQL_QUERIES,
+    REQUEST_SQL_DURATION,
+    TEMPLATE_RENDER_DURATION,
+    DB_POOL_CHECKOUT_DURATION,
+    DB_CONNECTIONS_OPENED,
+    DB_POOL_CONNECTIONS,
+    CacheCounter("guineapigs_cache_hits_total", "Cache hits", "hits", CACHES),
+    CacheCounter("guineapigs_cache_misses_total", "Cache misses", "misses", CACHES),
+)
+
+
+class RequestStats:  # pylint: disable=too-few-public-methods
+    """
+    SQL statements and time of the current request, kept in flask.g
+    """
+
+    __slots__ = ("start", "queries", "query_time")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+
+
+def _request_started(_sender, **_kwargs):
+    g.request_stats = RequestStats()
+
+
+def _request_finished(_sender, response, **_kwargs):
+    stats = g.get("request_stats")
+    if stats is None:
+        return
+    endpoint = request.endpoint or "none"
+    method = request.method
+    status = str(response.status_code)
+
+    def observe():
+        REQUEST_DURATION.observe(
+            time.perf_counter() - stats.start, endpoint, method, status
+        )
+        REQUEST_SQL_QUERIES.observe(stats.queries, endpoint)
+        REQUEST_SQL_DURATION.observe(stats.query_time, endpoint)
+
+    # streamed responses are still being rendered at this point
+    response.call_on_close(observe)
+
+
+def _before_render_template(_sender, template, **_kwargs):
+    g.setdefault("render_starts", []).append(time.perf_counter())
+
+
+def _template_rendered(_sender, template, **_kwargs):
+    if starts := g.get("render_starts"):
+        TEMPLATE_RENDER_DURATION.observe(
+            time.perf_counter() - starts.pop(), template.name or "string"
+        )
+
+
+def _before_cursor_execute(conn, *_args):
+    conn.info.setdefault("query_starts", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, *_args):
+    elapsed = time.perf_counter() - conn.info["query_starts"].pop()
+    if has_app_context() and (stats := g.get("request_stats")):
+        stats.queries += 1
+        stats.query_time += elapsed
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def exposition():
+    """
+    returns every metric in Prometheus text format
+    """
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for suffix, labels, value in metric.samples():
+            lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+@blueprint.route("/metrics")
+def metrics():
+    """
+    serves metrics to Prometheus with METRICS_TOKEN as bearer token, not
+    found when METRICS_TOKEN isn't set
+    """
+    if not (token := current_app.config["METRICS_TOKEN"]):
+        return abort(404)
+    if not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return abort(401)
+    return Response(exposition(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(flask_app):
+    """
+    hooks request, template and SQL instrumentation into flask_app
+    """
+    request_started.connect(_request_started, flask_app)
+    request_finished.connect(_request_finished, flask_app)
+    before_render_template.connect(_before_render_template, flask_app)
+    template_rendered.connect(_template_rendered, flask_app)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    flask_app.register_blueprint(blueprint)
@@ -1,10 +1,24 @@
 """
     Database models and tables
 """
+from collections import Counter, namedtuple
 from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql.functions import GenericFunction
+from guineapigs.cache import reference_cache
 from guineapigs.extensions import db
-from guineapigs.utils import beginning_of_day_utc
+from guineapigs.utils import (
+    local_date_to_utc,
+    local_today,
+    next_day,
+    to_local_date,
+)
 
 food_entries = db.Table(
     "food_entries",
@@ -14,7 +28,114 @@ food_entries = db.Table(
     db.Column(
         "guinea_pig_id", db.Integer, db.ForeignKey("guinea_pig.id"), primary_key=True
     ),
+    db.Index("ix_food_entries_guinea_pig_id", "guinea_pig_id"),
+)
+
+FoodTypeRow = namedtuple(
+    "FoodTypeRow", ("id", "label", "recommendations", "in_statistics", "is_hidden")
+)
+GuineaPigRow = namedtuple("GuineaPigRow", ("id", "name"))
+FoodFrequency = namedtuple(
+    "FoodFrequency", ("food_type_id", "label", "count", "guinea_pigs")
 )
+WeightBucket = namedtuple(
+    "WeightBucket",
+    ("guinea_pig_id", "name", "start", "min", "avg", "max", "count", "last"),
+)
+
+
+def _upsert(table, values, set_, execute=None):
+    """
+    updates the row of table with the primary key in values with set_, or
+    inserts values if there is none. concurrent first writes can't both
+    insert: postgres upserts in one statement, elsewhere the update runs
+    first and again if the insert is ignored because another one won
+    """
+    execute = execute or db.session.execute  # pylint: disable=no-member
+    if db.engine.dialect.name == "postgresql":
+        execute(
+            postgresql.insert(table)
+            .values(values)
+            .on_conflict_do_update(index_elements=table.primary_key, set_=set_)
+        )
+        return
+    key = [column == values[column.name] for column in table.primary_key]
+    update = table.update().where(db.and_(*key)).values(set_)
+    if execute(update).rowcount:
+        return
+    insert = table.insert().prefix_with("OR IGNORE", dialect="sqlite")
+    if not execute(insert, values).rowcount:
+        execute(update)
+
+
+class DataVersion(db.Model):
+    """
+    Version of each table, bumped in the transaction that writes its rows,
+    so readers can tell whether anything changed with one small query
+    """
+
+    __tablename__ = "data_version"
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def get_all(cls):
+        """
+        returns {table name: version}, remembered for the rest of the request
+        so reference data can be read at the same versions
+        """
+        versions = dict(
+            db.session.query(cls.name, cls.version)  # pylint: disable=no-member
+        )
+        if has_app_context():
+            g.data_versions = versions
+        return versions
+
+    @classmethod
+    def bump(cls, *names, connection=None):
+        """
+        increments the version of tables names on connection (the session by
+        default), needed after bulk statements (ORM writes are picked up by
+        the before_flush listener below)
+        """
+        table = cls.__table__
+        for name in names:
+            _upsert(
+                table,
+                {"name": name, "version": 1},
+                {"version": table.c.version + 1},
+                connection and connection.execute,
+            )
+
+
+@event.listens_for(db.session, "before_flush")
+def bump_data_versions(session, _flush_context, _instances):
+    """
+    bumps the version of every table with pending ORM writes
+    """
+    names = {
+        instance.__tablename__
+        for instance in (*session.new, *session.deleted)
+        if not isinstance(instance, DataVersion)
+    }
+    names.update(
+        instance.__tablename__
+        for instance in session.dirty
+        if not isinstance(instance, DataVersion) and session.is_modified(instance)
+    )
+    DataVersion.bump(*sorted(names))
+
+
+def _reference_rows(table, rows):
+    """
+    returns rows() from reference_cache. once the request has loaded the
+    data versions (pages and ETags cached under them) the rows are cached
+    under the version of table too, so another worker's write is never
+    cached under its version with rows read before it
+    """
+    versions = g.get("data_versions") if has_app_context() else None
+    version = None if versions is None else versions.get(table, 0)
+    return reference_cache.get_or_set((table, version), rows)
 
 
 class User(db.Model):
@@ -67,6 +188,22 @@ class GuineaPig(db.Model):  # pylint: disable=too-few-public-methods
     food_entries = db.relationship("FoodEntry", secondary=food_entries)
     weight_entries = db.relationship("WeightEntry")
 
+    @classmethod
+    def get_all(cls):
+        """
+        returns every guinea pig ordered by name as GuineaPigRows, cached
+        until a guinea pig is written or REFERENCE_CACHE_TTL passes
+        """
+        return _reference_rows(
+            cls.__tablename__,
+            lambda: [
+                GuineaPigRow(*row)
+                for row in db.session.query(  # pylint: disable=no-member
+                    cls.id, cls.name
+                ).order_by(cls.name)
+            ],
+        )
+
 
 class FoodType(db.Model):  # pylint: disable=too-few-public-methods
     """
@@ -88,6 +225,26 @@ class FoodType(db.Model):  # pylint: disable=too-few-public-methods
         info={"label": "hide in food entry list"},
     )
 
+    @classmethod
+    def get_all(cls):
+        """
+        returns every food type ordered by label as FoodTypeRows, cached
+        until a food type is written or REFERENCE_CACHE_TTL passes
+        """
+        return _reference_rows(
+            cls.__tablename__,
+            lambda: [
+                FoodTypeRow(*row)
+                for row in db.session.query(  # pylint: disable=no-member
+                    cls.id,
+                    cls.label,
+                    cls.recommendations,
+                    cls.in_statistics,
+                    cls.is_hidden,
+                ).order_by(cls.label)
+            ],
+        )
+
 
 class Entry:
     """
@@ -96,8 +253,22 @@ class Entry:
 
     utc_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # name of the entries in the history, which orders entries with the
+    # same (utc_date, id) by it since every table numbers its ids
+    kind = None
+
+    # relationships loaded up front when eager=True, {name: loader option}
+    eager_loads = {"user": db.joinedload}
+
+    @classmethod
+    def eager_options(cls):
+        """
+        returns query options that load eager_loads along with the entries
+        """
+        return [loader(getattr(cls, name)) for name, loader in cls.eager_loads.items()]
+
     @classmethod
-    def get_in_time_range(cls, start=None, end=None):
+    def get_in_time_range(cls, start=None, end=None, eager=False):
         """
         returns entries in time range or an empty list if time range
         is not specified
@@ -109,6 +280,9 @@ class Entry:
             cls.utc_date
         )
 
+        if eager:
+            query = query.options(*cls.eager_options())
+
         if start:
             query = query.filter(cls.utc_date >= start)
 
@@ -117,12 +291,41 @@ class Entry:
 
         return query.all()
 
+    @classmethod
+    def get_page(cls, start, end, before=None, limit=None):
+        """
+        returns query for entries in time range, newest first, that come
+        after the (utc_date, id, kind) cursor `before` of the history
+        (keyset pagination)
+        """
+        query = db.session.query(cls).filter(  # pylint: disable=no-member
+            cls.utc_date >= start, cls.utc_date < end
+        )
+
+        if before:
+            utc_date, id_, kind = before
+            key = db.tuple_(cls.utc_date, cls.id)
+            # kind breaks (utc_date, id) ties, entries of a kind before the
+            # cursor's come after it
+            query = query.filter(
+                key <= (utc_date, id_) if cls.kind < kind else key < (utc_date, id_)
+            )
+
+        return query.order_by(cls.utc_date.desc(), cls.id.desc()).limit(limit)
+
+    @property
+    def local_day(self):
+        """
+        returns the day of the entry in configured timezone
+        """
+        return to_local_date(self.utc_date)
+
     @declared_attr
     def user_id(self):
         """
         adds user foreign key to entry table
         """
-        return db.Column(db.Integer, db.ForeignKey("user.id"))
+        return db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
 
     @declared_attr
     def user(self):
@@ -137,12 +340,80 @@ class FoodEntry(db.Model, Entry):
     A food entry can have many guinea pigs
     """
 
+    kind = "food"
     __tablename__ = "food_entry"
+    __table_args__ = (
+        db.Index("ix_food_entry_utc_date_id", "utc_date", "id"),
+        db.Index("ix_food_entry_food_type_id_utc_date", "food_type_id", "utc_date"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     food_type_id = db.Column(db.Integer, db.ForeignKey("food_type.id"), nullable=False)
     food_type = db.relationship("FoodType")
     notes = db.Column(db.String(512))
     guinea_pigs = db.relationship("GuineaPig", secondary=food_entries)
+    eager_loads = {
+        "user": db.joinedload,
+        "food_type": db.joinedload,
+        "guinea_pigs": db.selectinload,
+    }
+
+    @classmethod
+    def delete_by_id(cls, id_):
+        """
+        deletes entry id_ and its guinea pig links without loading them,
+        returns (food_type_id, utc_date) of the entry or None if there was
+        none or a concurrent request deleted it first, postgres returns them
+        from the delete itself
+        """
+        if db.engine.dialect.name == "postgresql":
+            # partitioned food_entry has no foreign key to cascade to the links
+            db.session.execute(  # pylint: disable=no-member
+                food_entries.delete().where(food_entries.c.food_entry_id == id_)
+            )
+            found = db.session.execute(  # pylint: disable=no-member
+                cls.__table__.delete()
+                .where(cls.id == id_)
+                .returning(cls.food_type_id, cls.utc_date)
+            ).first()
+            if not found:
+                return None
+            DataVersion.bump(cls.__tablename__)
+            return tuple(found)
+        found = (
+            db.session.query(  # pylint: disable=no-member
+                cls.food_type_id, cls.utc_date
+            )
+            .filter(cls.id == id_)
+            .first()
+        )
+        if not found:
+            return None
+        db.session.execute(  # pylint: disable=no-member
+            food_entries.delete().where(food_entries.c.food_entry_id == id_)
+        )
+        if not cls.query.filter(cls.id == id_).delete(synchronize_session=False):
+            return None
+        DataVersion.bump(cls.__tablename__)
+        return found
+
+    @classmethod
+    def link_guinea_pigs(cls, id_, guinea_pig_ids, replace=False):
+        """
+        links entry id_ to guinea_pig_ids with one insert, removing its
+        previous links first if replace
+        """
+        if replace:
+            db.session.execute(  # pylint: disable=no-member
+                food_entries.delete().where(food_entries.c.food_entry_id == id_)
+            )
+        if guinea_pig_ids:
+            db.session.execute(  # pylint: disable=no-member
+                food_entries.insert(),
+                [
+                    {"food_entry_id": id_, "guinea_pig_id": guinea_pig_id}
+                    for guinea_pig_id in guinea_pig_ids
+                ],
+            )
 
     @classmethod
     def get_statistics(cls):
@@ -151,74 +422,174 @@ class FoodEntry(db.Model, Entry):
             returns dict {stat_type: stat_value}
         """
         statistics = {}
-        count_query = (
+        rows = (
             db.session.query(  # pylint: disable=no-member
-                FoodEntry.food_type_id, FoodType.label
+                FoodType.label,
+                db.func.coalesce(FoodStatistic.count, 0),  # pylint: disable=no-member
+                FoodStatistic.last_utc_date,
             )
-            .outerjoin(FoodEntry)
+            .outerjoin(FoodStatistic)
             .filter(FoodType.in_statistics == True, FoodType.is_hidden == False)   # pylint: disable=singleton-comparison
-            .subquery()
+            .all()
         )
 
-        food_count = db.session.query(  # pylint: disable=no-member
-            count_query.c.label,
-            db.func.count(count_query.c.food_type_id).label( # pylint: disable=no-member
-                "count"
-            ),
-        ).group_by(count_query.c.label)
+        if rows:
+            statistics["least frequent"] = min(rows, key=itemgetter(1))[0]
+            statistics["most frequent"] = max(rows, key=itemgetter(1))[0]
 
-        latest_query = (  # pylint: disable=no-member
-            db.session.query(  # pylint: disable=no-member
-                FoodType.label,
-                db.func.max(FoodEntry.utc_date).label(  # pylint: disable=no-member
-                    "max"
-                ),
-            )
-            .join(FoodType)
-            .filter(FoodType.in_statistics == True, FoodType.is_hidden == False) # pylint: disable=singleton-comparison
-            .group_by(FoodType.label)
-        )
+        if fed := [row for row in rows if row[2]]:
+            statistics["oldest"] = min(fed, key=itemgetter(2))[0]
+            statistics["latest"] = max(fed, key=itemgetter(2))[0]
 
-        if least_frequent := food_count.order_by(db.text("count")).first():
-            statistics["least frequent"] = least_frequent[0]
+        return statistics
 
-        if most_frequent := food_count.order_by(db.desc(db.text("count"))).first():
-            statistics["most frequent"] = most_frequent[0]
 
-        if oldest := latest_query.order_by(db.text("max")).first():
-            statistics["oldest"] = oldest[0]
+class FoodStatistic(db.Model):
+    """
+    Number of entries and time of the latest entry for each food type,
+    kept up to date as food entries are written
+    """
 
-        if latest := latest_query.order_by(db.desc(db.text("max"))).first():
-            statistics["latest"] = latest[0]
+    __tablename__ = "food_statistic"
+    food_type_id = db.Column(
+        db.Integer, db.ForeignKey("food_type.id"), primary_key=True
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
+    last_utc_date = db.Column(db.DateTime)
 
-        return statistics
+    @classmethod
+    def add_entry(cls, food_type_id, utc_date, count=1):
+        """
+        counts count new entries of food_type_id, the latest made at utc_date
+        """
+        table = cls.__table__
+        _upsert(
+            table,
+            {"food_type_id": food_type_id, "count": count, "last_utc_date": utc_date},
+            {
+                "count": table.c.count + count,
+                "last_utc_date": db.case(
+                    [(table.c.last_utc_date > utc_date, table.c.last_utc_date)],
+                    else_=utc_date,
+                ),
+            },
+        )
+
+    @classmethod
+    def remove_entry(cls, food_type_id):
+        """
+        uncounts an entry of food_type_id, must run after the entry is deleted
+        """
+        last_utc_date = (
+            db.session.query(  # pylint: disable=no-member
+                db.func.max(FoodEntry.utc_date)  # pylint: disable=no-member
+            )
+            .filter(FoodEntry.food_type_id == food_type_id)
+            .as_scalar()
+        )
+        cls.query.filter(cls.food_type_id == food_type_id).update(
+            {cls.count: cls.count - 1, cls.last_utc_date: last_utc_date},
+            synchronize_session=False,
+        )
+
+    @classmethod
+    def rebuild(cls, food_type_ids=None):
+        """
+        recomputes statistics of food_type_ids (every food type by default)
+        from food entries
+        """
+        deleted = cls.query
+        statistics = (
+            db.session.query(  # pylint: disable=no-member
+                FoodType.id,
+                db.func.count(FoodEntry.id),  # pylint: disable=no-member
+                db.func.max(FoodEntry.utc_date),  # pylint: disable=no-member
+            )
+            .outerjoin(FoodEntry)
+            .group_by(FoodType.id)
+        )
+        if food_type_ids is not None:
+            deleted = deleted.filter(cls.food_type_id.in_(food_type_ids))
+            statistics = statistics.filter(FoodType.id.in_(food_type_ids))
+
+        deleted.delete(synchronize_session=False)
+        db.session.execute(  # pylint: disable=no-member
+            cls.__table__.insert().from_select(
+                ["food_type_id", "count", "last_utc_date"], statistics.statement
+            )
+        )
 
 
 class VitaminCEntry(db.Model, Entry):
     """
-    Vitamin C entries only have users and timestamps
+    Vitamin C entries only have users and timestamps, and there is at most
+    one per local day
     """
 
+    kind = "vitamin c"
     __tablename__ = "vitamin_c_entry"
+    __table_args__ = (
+        db.Index("ix_vitamin_c_entry_utc_date_id", "utc_date", "id"),
+        db.UniqueConstraint("local_day", name="uq_vitamin_c_entry_local_day"),
+    )
     id = db.Column(db.Integer, primary_key=True)
+    local_day = db.Column(db.Date, nullable=False)
 
     @classmethod
     def get_today(cls):
         """
         returns vitamin C entry for today if found
         """
-        return VitaminCEntry.query.filter(
-            VitaminCEntry.utc_date >= beginning_of_day_utc()
-        ).first()
+        return (
+            VitaminCEntry.query.options(*cls.eager_options())
+            .filter(VitaminCEntry.local_day == local_today())
+            .first()
+        )
 
     @classmethod
     def delete_today(cls):
         """
-        deletes and returns vitamin C entry for today if found
+        deletes today's vitamin C entry and returns how many were deleted
         """
-        return VitaminCEntry.query.filter(
-            VitaminCEntry.utc_date >= beginning_of_day_utc()
-        ).delete()
+        deleted = VitaminCEntry.query.filter(
+            VitaminCEntry.local_day == local_today()
+        ).delete(synchronize_session=False)
+        if deleted:
+            DataVersion.bump(cls.__tablename__)
+        return deleted
+
+    @classmethod
+    def insert_unless_taken(cls):
+        """
+        returns an insert that skips entries whose local_day is taken already
+        """
+        if db.engine.dialect.name == "postgresql":
+            return postgresql.insert(cls.__table__).on_conflict_do_nothing()
+        return cls.__table__.insert().prefix_with("OR IGNORE", dialect="sqlite")
+
+    @classmethod
+    def toggle_today(cls, user):
+        """
+        deletes today's vitamin C entry, or adds one by user if there was
+        none. returns the entry added (not attached to the session) or None.
+        concurrent toggles can't add two entries: the insert is skipped if
+        the unique local_day is taken, returning the entry that took it
+        """
+        if cls.delete_today():
+            return None
+        utc_date = datetime.utcnow()
+        values = {
+            "utc_date": utc_date,
+            "local_day": to_local_date(utc_date),
+            "user_id": user.id,
+        }
+        inserted = db.session.execute(  # pylint: disable=no-member
+            cls.insert_unless_taken(), values
+        ).rowcount
+        if not inserted:
+            return cls.get_today()
+        DataVersion.bump(cls.__tablename__)
+        return cls(utc_date=utc_date, local_day=values["local_day"], user=user)
 
 
 class WeightEntry(db.Model, Entry):
@@ -226,24 +597,426 @@ class WeightEntry(db.Model, Entry):
     Weight entries can only have one guineapig
     """
 
+    kind = "weight"
     __tablename__ = "weight_entry"
+    __table_args__ = (
+        db.Index("ix_weight_entry_utc_date_id", "utc_date", "id"),
+        db.Index(
+            "ix_weight_entry_guinea_pig_id_utc_date", "guinea_pig_id", "utc_date"
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     value = db.Column(db.Float, nullable=False)
     guinea_pig_id = db.Column(
         db.Integer, db.ForeignKey("guinea_pig.id"), nullable=False
     )
     guinea_pig = db.relationship("GuineaPig")
+    eager_loads = {"user": db.joinedload, "guinea_pig": db.joinedload}
+
+    @property
+    def rollup_key(self):
+        """
+        returns (guinea_pig_id, local day) of the WeightRollup row of entry
+        """
+        return self.guinea_pig_id, self.local_day
 
     @classmethod
     def get_most_recent(cls):
         """
         returns most recent weight or none for each guineapig [(GuineaPig.name, weight)]
+        (one index lookup per guinea pig on guinea_pig_id, utc_date)
         """
+        latest_value = (
+            db.session.query(WeightEntry.value)  # pylint: disable=no-member
+            .filter(WeightEntry.guinea_pig_id == GuineaPig.id)
+            .order_by(WeightEntry.utc_date.desc())
+            .limit(1)
+            .correlate(GuineaPig)
+            .as_scalar()
+        )
+        return (
+            db.session.query(  # pylint: disable=no-member
+                GuineaPig.name, latest_value
+            )
+            .order_by(GuineaPig.name)
+        )
+
+
+class date_bucket(GenericFunction):  # pylint: disable=invalid-name,too-many-ancestors
+    """
+    truncates a date to the first day of its period ("day", "week" starting
+    on monday or "month")
+    """
+
+    type = db.Date()
+
+    def __init__(self, period, date, **kwargs):
+        self.period = period
+        super().__init__(date, **kwargs)
+
+
+@compiles(date_bucket)
+def _sqlite_date_bucket(element, compiler, **kwargs):
+    date = compiler.process(element.clauses, **kwargs)
+    if element.period == "week":
         return (
-            db.session.query( # pylint: disable=no-member
-                GuineaPig.name, WeightEntry.value
+            f"date({date}, '-' || ((CAST(strftime('%w', {date}) AS INTEGER) + 6) "
+            "% 7) || ' days')"
+        )
+    if element.period == "month":
+        return f"date({date}, 'start of month')"
+    return date
+
+
+@compiles(date_bucket, "postgresql")
+def _date_trunc(element, compiler, **kwargs):
+    date = compiler.process(element.clauses, **kwargs)
+    return f"CAST(date_trunc('{element.period}', {date}) AS DATE)"
+
+
+def _day_ranges(days, per_batch=200):
+    """
+    yields batches of per_batch (first, last) ranges of consecutive local
+    days covering days, a statement filters on one batch (sqlite limits the
+    depth of the expression the ranges add up to)
+    """
+    ranges = []
+    for day in sorted(days):
+        if ranges and next_day(ranges[-1][1]) == day:
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    for start in range(0, len(ranges), per_batch):
+        yield ranges[start : start + per_batch]
+
+
+def _on_days(utc_date, ranges):
+    """
+    returns a clause matching the utc_date column on the local days of
+    (first, last) ranges
+    """
+    return db.or_(
+        *(
+            db.and_(
+                utc_date >= local_date_to_utc(first),
+                utc_date < local_date_to_utc(next_day(last)),
+            )
+            for first, last in ranges
+        )
+    )
+
+
+class WeightRollup(db.Model):
+    """
+    Daily weight summary of each guinea pig, days are in the configured
+    timezone. kept up to date as weight entries are written
+    """
+
+    __tablename__ = "weight_rollup"
+    guinea_pig_id = db.Column(
+        db.Integer, db.ForeignKey("guinea_pig.id"), primary_key=True
+    )
+    local_day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False)
+    last_utc_date = db.Column(db.DateTime, nullable=False)
+    last_value = db.Column(db.Float, nullable=False)
+
+    @staticmethod
+    def _summarize(guinea_pig_id, local_day, entries):
+        """
+        returns the row of [(utc_date, value)] ordered by utc_date
+        """
+        values = [value for _, value in entries]
+        return {
+            "guinea_pig_id": guinea_pig_id,
+            "local_day": local_day,
+            "count": len(values),
+            "min_value": min(values),
+            "max_value": max(values),
+            "sum_value": sum(values),
+            "last_utc_date": entries[-1][0],
+            "last_value": values[-1],
+        }
+
+    @classmethod
+    def _summarize_days(cls, entries):
+        """
+        yields the rows of [(guinea_pig_id, utc_date, value)] ordered by
+        guinea pig and utc_date
+        """
+        return (
+            cls._summarize(
+                guinea_pig_id,
+                local_day,
+                [(utc_date, value) for _, utc_date, value in day_entries],
+            )
+            for (guinea_pig_id, local_day), day_entries in groupby(
+                entries, key=lambda entry: (entry[0], to_local_date(entry[1]))
+            )
+        )
+
+    @classmethod
+    def refresh(cls, days):
+        """
+        recomputes the rows of (guinea_pig_id, local day) pairs in days from
+        their weight entries, with one delete, select and executemany per
+        batch of days however many pairs there are
+        """
+        guinea_pig_ids = {guinea_pig_id for guinea_pig_id, _ in days}
+        for ranges in _day_ranges({local_day for _, local_day in days}):
+            # every guinea pig is recomputed on every day, pairs that aren't
+            # in days are written back as they were
+            cls.query.filter(
+                cls.guinea_pig_id.in_(guinea_pig_ids),
+                db.or_(*(cls.local_day.between(first, last) for first, last in ranges)),
+            ).delete(synchronize_session=False)
+            entries = (
+                db.session.query(  # pylint: disable=no-member
+                    WeightEntry.guinea_pig_id, WeightEntry.utc_date, WeightEntry.value
+                )
+                .filter(
+                    WeightEntry.guinea_pig_id.in_(guinea_pig_ids),
+                    _on_days(WeightEntry.utc_date, ranges),
+                )
+                .order_by(WeightEntry.guinea_pig_id, WeightEntry.utc_date)
+            )
+            if rows := list(cls._summarize_days(entries)):
+                db.session.execute(  # pylint: disable=no-member
+                    cls.__table__.insert(), rows
+                )
+
+    @classmethod
+    def rebuild(cls, chunk_size=1000):
+        """
+        recomputes every row from weight entries
+        """
+        cls.query.delete(synchronize_session=False)
+        entries = (
+            db.session.query(  # pylint: disable=no-member
+                WeightEntry.guinea_pig_id, WeightEntry.utc_date, WeightEntry.value
+            )
+            .order_by(WeightEntry.guinea_pig_id, WeightEntry.utc_date)
+            .yield_per(chunk_size)
+        )
+        rows = cls._summarize_days(entries)
+        while chunk := list(islice(rows, chunk_size)):
+            db.session.execute(  # pylint: disable=no-member
+                cls.__table__.insert(), chunk
+            )
+
+    @classmethod
+    def get_trend(cls, start, end, period="day", guinea_pig_ids=None):
+        """
+        returns WeightBuckets of each guinea pig between local days start and
+        end (inclusive) grouped by period ("day", "week" or "month"), ordered
+        by guinea pig name and bucket start
+        """
+        bucket = date_bucket(period, cls.local_day).label("start")
+        buckets = db.session.query(  # pylint: disable=no-member
+            cls.guinea_pig_id,
+            bucket,
+            db.func.min(cls.min_value).label("min"),  # pylint: disable=no-member
+            (
+                db.func.sum(cls.sum_value)  # pylint: disable=no-member
+                / db.func.sum(cls.count)  # pylint: disable=no-member
+            ).label("avg"),
+            db.func.max(cls.max_value).label("max"),  # pylint: disable=no-member
+            db.func.sum(cls.count).label("count"),  # pylint: disable=no-member
+            db.func.max(cls.local_day).label("last_day"),  # pylint: disable=no-member
+        ).filter(cls.local_day >= start, cls.local_day <= end)
+        if guinea_pig_ids is not None:
+            buckets = buckets.filter(cls.guinea_pig_id.in_(guinea_pig_ids))
+        buckets = buckets.group_by(cls.guinea_pig_id, bucket).subquery()
+
+        last = db.aliased(cls)
+        query = (
+            db.session.query(  # pylint: disable=no-member
+                GuineaPig.id,
+                GuineaPig.name,
+                buckets.c.start,
+                buckets.c.min,
+                buckets.c.avg,
+                buckets.c.max,
+                buckets.c.count,
+                last.last_value,
+            )
+            .join(buckets, buckets.c.guinea_pig_id == GuineaPig.id)
+            .join(
+                last,
+                db.and_(
+                    last.guinea_pig_id == buckets.c.guinea_pig_id,
+                    last.local_day == buckets.c.last_day,
+                ),
+            )
+            .order_by(GuineaPig.name, GuineaPig.id, buckets.c.start)
+        )
+        return [WeightBucket._make(row) for row in query]
+
+
+class FoodRollup(db.Model):
+    """
+    Number of food entries of each food type per day (in the configured
+    timezone), in total (guinea_pig_id is NULL) and for each guinea pig fed.
+    kept up to date as food entries are written
+    """
+
+    __tablename__ = "food_rollup"
+    id = db.Column(db.Integer, primary_key=True)
+    local_day = db.Column(db.Date, nullable=False)
+    food_type_id = db.Column(db.Integer, db.ForeignKey("food_type.id"), nullable=False)
+    guinea_pig_id = db.Column(db.Integer, db.ForeignKey("guinea_pig.id"))
+    count = db.Column(db.Integer, nullable=False)
+    __table_args__ = (
+        db.Index("ix_food_rollup_local_day_food_type_id", "local_day", "food_type_id"),
+        db.UniqueConstraint(
+            "local_day",
+            "food_type_id",
+            "guinea_pig_id",
+            name="uq_food_rollup_local_day_food_type_id_guinea_pig_id",
+        ),
+        # NULLs are distinct in the constraint above, totals need their own
+        db.Index(
+            "uq_food_rollup_local_day_food_type_id_total",
+            "local_day",
+            "food_type_id",
+            unique=True,
+            postgresql_where=guinea_pig_id.is_(None),
+            sqlite_where=guinea_pig_id.is_(None),
+        ),
+    )
+
+    @classmethod
+    def refresh(cls, start=None, end=None, food_type_ids=None, chunk_size=1000):
+        """
+        recomputes the rows of local days start to end (inclusive, every day
+        by default) and of food_type_ids (every food type by default).
+        on postgres the food types are locked first, so concurrent refreshes
+        of a food type run one after the other and the later one sees (and
+        replaces) the rows of the earlier one
+        """
+        cls._lock(food_type_ids)
+        deleted = cls.query
+        entries = cls._entries()
+        if start:
+            deleted = deleted.filter(cls.local_day >= start)
+            entries = entries.filter(FoodEntry.utc_date >= local_date_to_utc(start))
+        if end:
+            deleted = deleted.filter(cls.local_day <= end)
+            entries = entries.filter(
+                FoodEntry.utc_date < local_date_to_utc(next_day(end))
+            )
+        cls._recompute(deleted, entries, food_type_ids, chunk_size)
+
+    @classmethod
+    def refresh_days(cls, days, food_type_ids, chunk_size=1000):
+        """
+        recomputes the rows of food_type_ids on the local days in days only,
+        reading the entries of those days however far apart they are
+        """
+        cls._lock(food_type_ids)
+        for ranges in _day_ranges(days):
+            cls._recompute(
+                cls.query.filter(
+                    db.or_(
+                        *(cls.local_day.between(first, last) for first, last in ranges)
+                    )
+                ),
+                cls._entries().filter(_on_days(FoodEntry.utc_date, ranges)),
+                food_type_ids,
+                chunk_size,
+            )
+
+    @staticmethod
+    def _lock(food_type_ids):
+        """
+        locks food_type_ids (every food type if None) on postgres
+        """
+        if db.engine.dialect.name == "postgresql":
+            locked = FoodType.query.with_entities(FoodType.id)
+            if food_type_ids is not None:
+                locked = locked.filter(FoodType.id.in_(food_type_ids))
+            locked.order_by(FoodType.id).with_for_update(key_share=True).all()
+
+    @staticmethod
+    def _entries():
+        """
+        returns a query of (id, utc_date, food_type_id, guinea_pig_id) of
+        food entries and their guinea pigs
+        """
+        return db.session.query(  # pylint: disable=no-member
+            FoodEntry.id,
+            FoodEntry.utc_date,
+            FoodEntry.food_type_id,
+            food_entries.c.guinea_pig_id,
+        ).outerjoin(food_entries, food_entries.c.food_entry_id == FoodEntry.id)
+
+    @classmethod
+    def _recompute(cls, deleted, entries, food_type_ids, chunk_size):
+        """
+        deletes the rows of the query deleted and inserts the counts of the
+        entries query in their place, both limited to food_type_ids
+        """
+        if food_type_ids is not None:
+            deleted = deleted.filter(cls.food_type_id.in_(food_type_ids))
+            entries = entries.filter(FoodEntry.food_type_id.in_(food_type_ids))
+        deleted.delete(synchronize_session=False)
+
+        counts = Counter()
+        for _, rows in groupby(
+            entries.order_by(FoodEntry.id).yield_per(chunk_size), key=itemgetter(0)
+        ):
+            rows = list(rows)
+            _, utc_date, food_type_id, _ = rows[0]
+            local_day = to_local_date(utc_date)
+            counts[local_day, food_type_id, None] += 1
+            for *_, guinea_pig_id in rows:
+                if guinea_pig_id is not None:
+                    counts[local_day, food_type_id, guinea_pig_id] += 1
+
+        rows = iter(
+            {
+                "local_day": local_day,
+                "food_type_id": food_type_id,
+                "guinea_pig_id": guinea_pig_id,
+                "count": count,
+            }
+            for (local_day, food_type_id, guinea_pig_id), count in counts.items()
+        )
+        while chunk := list(islice(rows, chunk_size)):
+            db.session.execute(  # pylint: disable=no-member
+                cls.__table__.insert(), chunk
+            )
+
+    @classmethod
+    def get_frequencies(cls, start, end):
+        """
+        returns a FoodFrequency (entries in total and {guinea pig id: entries})
+        of every food type fed between local days start and end (inclusive),
+        most frequent first
+        """
+        query = (
+            db.session.query(  # pylint: disable=no-member
+                cls.food_type_id,
+                FoodType.label,
+                cls.guinea_pig_id,
+                db.func.sum(cls.count),  # pylint: disable=no-member
             )
-            .outerjoin(WeightEntry)
-            .distinct(GuineaPig.name)
-            .order_by(GuineaPig.name, WeightEntry.utc_date.desc())
+            .join(FoodType, FoodType.id == cls.food_type_id)
+            .filter(cls.local_day >= start, cls.local_day <= end)
+            .group_by(cls.food_type_id, FoodType.label, cls.guinea_pig_id)
+            .order_by(cls.food_type_id, cls.guinea_pig_id)
         )
+        frequencies = []
+        for (food_type_id, label), rows in groupby(query, key=itemgetter(0, 1)):
+            total, guinea_pigs = 0, {}
+            for *_, guinea_pig_id, count in rows:
+                if guinea_pig_id is None:
+                    total = count
+                else:
+                    guinea_pigs[guinea_pig_id] = count
+            frequencies.append(FoodFrequency(food_type_id, label, total, guinea_pigs))
+        frequencies.sort(key=lambda frequency: (-frequency.count, frequency.label))
+        return frequencies
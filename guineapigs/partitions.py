@@ -0,0 +1,277 @@
+"""
+    optional PostgreSQL range partitioning of entry tables on utc_date
+
+    each partitioned table gets a partition per month or year
+    (ENTRY_PARTITION_PERIOD) plus a DEFAULT partition catching rows no
+    partition covers yet. range queries on utc_date only read the
+    partitions they overlap, and old partitions can be detached (a catalog
+    change, no rows are rewritten) and archived or dropped.
+
+    primary keys become (id, utc_date) since PostgreSQL requires unique
+    constraints to include the partition key, which also means foreign
+    keys can't reference a partitioned table (food_entries.food_entry_id
+    loses its constraint while food_entry is partitioned)
+"""
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+
+TABLES = ("food_entry", "weight_entry")
+PERIODS = ("month", "year")
+
+# foreign keys referencing TABLES, dropped while they are partitioned
+# {table: [(referencing table, constraint name, column)]}
+REFERENCES = {
+    "food_entry": [("food_entries", "food_entries_food_entry_id_fkey", "food_entry_id")]
+}
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(day, period):
+    """
+    returns the first day of the month or year of day
+    """
+    if period == "year":
+        return date(day.year, 1, 1)
+    return date(day.year, day.month, 1)
+
+
+def next_period(start, period):
+    """
+    returns the first day of the month or year after the one starting at start
+    """
+    if period == "year":
+        return date(start.year + 1, 1, 1)
+    if start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def partition_name(table, start, period):
+    """
+    returns the name of the partition of table starting at start
+    """
+    return f"{table}_p{start:%Y}" if period == "year" else f"{table}_p{start:%Y_%m}"
+
+
+def is_partitioned(connection, table):
+    """
+    returns whether table is a partitioned table
+    """
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table)"
+            ),
+            table=table,
+        ).scalar()
+    )
+
+
+def list_partitions(connection, table):
+    """
+    returns [(name, start, end)] of the range partitions of table, oldest
+    first (the DEFAULT partition is left out)
+    """
+    rows = connection.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.oid = to_regclass(:table)"
+        ),
+        table=table,
+    )
+    partitions = []
+    for name, bounds in rows:
+        if match := _BOUNDS.search(bounds):
+            start, end = map(datetime.fromisoformat, match.groups())
+            partitions.append((name, start, end))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(connection, table, start, period):
+    """
+    creates the partition of table starting at start unless it exists,
+    moving its rows out of the DEFAULT partition first. returns its name
+    or None if it existed
+    """
+    name = partition_name(table, start, period)
+    if connection.execute(text("SELECT to_regclass(:name)"), name=name).scalar():
+        return None
+    end = next_period(start, period)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {table}_default "
+            "WHERE utc_date >= :start AND utc_date < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        start=start,
+        end=end,
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    return name
+
+
+def ensure(connection, period, ahead=3, tables=TABLES):
+    """
+    creates the partitions of the current and the next ahead periods of
+    every partitioned table, returns the names of the ones created
+    """
+    created = []
+    for table in tables:
+        if not is_partitioned(connection, table):
+            continue
+        start = period_start(date.today(), period)
+        for _ in range(ahead + 1):
+            if name := create_partition(connection, table, start, period):
+                created.append(name)
+            start = next_period(start, period)
+    return created
+
+
+def detach(connection, before, drop=False, tables=TABLES):
+    """
+    detaches the partitions holding only rows older than before (a date),
+    dropping them too if drop. returns their names
+    """
+    detached = []
+    for table in tables:
+        if not is_partitioned(connection, table):
+            continue
+        for name, _, end in list_partitions(connection, table):
+            if end.date() > before:
+                continue
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if drop:
+                for referencing, _, column in REFERENCES.get(table, ()):
+                    connection.execute(
+                        text(
+                            f"DELETE FROM {referencing} "
+                            f"WHERE {column} IN (SELECT id FROM {name})"
+                        )
+                    )
+                connection.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+    return detached
+
+
+def _definitions(connection, table):
+    """
+    returns ([CREATE INDEX statements], [(foreign key name, definition)])
+    of table, leaving out its primary key
+    """
+    indexes = [
+        definition.replace(" ON ONLY ", " ON ")
+        for (definition,) in connection.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = :table AND indexname <> :primary_key"
+            ),
+            table=table,
+            primary_key=f"{table}_pkey",
+        )
+    ]
+    foreign_keys = list(
+        connection.execute(
+            text(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+            ),
+            table=table,
+        )
+    )
+    return indexes, foreign_keys
+
+
+def _rebuild(connection, table, create, primary_key, prepare=None):
+    """
+    replaces table with a copy created by the statement create (which gets
+    the renamed table's name as {old}) and prepared by prepare(), keeping
+    rows, sequence, indexes and foreign keys
+    """
+    old = f"{table}_old"
+    indexes, foreign_keys = _definitions(connection, table)
+    sequence = connection.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), table=table
+    ).scalar()
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(create.format(old=old)))
+    if prepare:
+        prepare()
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))
+    connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    connection.execute(text(f"DROP TABLE {old} CASCADE"))
+    connection.execute(
+        text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey {primary_key}")
+    )
+    for index in indexes:
+        connection.execute(text(index))
+    for name, definition in foreign_keys:
+        connection.execute(
+            text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        )
+
+
+def partition(connection, table, period, ahead=3):
+    """
+    converts table into a table partitioned by period on utc_date, with
+    partitions from its oldest row until ahead periods from now
+    """
+    for referencing, name, _ in REFERENCES.get(table, ()):
+        connection.execute(
+            text(f"ALTER TABLE {referencing} DROP CONSTRAINT IF EXISTS {name}")
+        )
+    oldest = connection.execute(text(f"SELECT min(utc_date) FROM {table}")).scalar()
+
+    def create_partitions():
+        connection.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN utc_date SET NOT NULL")
+        )
+        connection.execute(
+            text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        )
+        start = period_start(oldest or date.today(), period)
+        last = period_start(date.today(), period)
+        for _ in range(ahead):
+            last = next_period(last, period)
+        while start <= last:
+            create_partition(connection, table, start, period)
+            start = next_period(start, period)
+
+    _rebuild(
+        connection,
+        table,
+        f"CREATE TABLE {table} (LIKE {{old}} INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (utc_date)",
+        "PRIMARY KEY (id, utc_date)",
+        create_partitions,
+    )
+
+
+def unpartition(connection, table):
+    """
+    converts partitioned table back into a regular table
+    """
+    _rebuild(
+        connection,
+        table,
+        f"CREATE TABLE {table} (LIKE {{old}} INCLUDING DEFAULTS)",
+        "PRIMARY KEY (id)",
+    )
+    for referencing, name, column in REFERENCES.get(table, ()):
+        connection.execute(
+            text(
+                f"ALTER TABLE {referencing} ADD CONSTRAINT {name} "
+                f"FOREIGN KEY ({column}) REFERENCES {table} (id)"
+            )
+        )
@@ -0,0 +1,71 @@
+"""
+    database connection pool options from config, with pools that report
+    checkout wait time and opened connections to guineapigs.metrics
+"""
+import time
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+from guineapigs import metrics
+
+
+class InstrumentedPoolMixin:
+    """
+    times every checkout (waiting for a free connection, opening a new one
+    and the pre-ping) and counts connections opened
+    """
+
+    def connect(self):
+        """
+        checks out a connection, recording how long it took
+        """
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.DB_POOL_CHECKOUT_DURATION.observe(time.perf_counter() - start)
+
+    def _create_connection(self):
+        metrics.DB_CONNECTIONS_OPENED.inc()
+        return super()._create_connection()
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """
+    QueuePool with checkout metrics
+    """
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    """
+    NullPool (a new connection per checkout) with checkout metrics
+    """
+
+
+def engine_options(config):
+    """
+    returns create_engine options for the DB_* pool settings in config.
+    with DB_PGBOUNCER set, connections aren't pooled by the app (PgBouncer
+    does it) so nothing depends on a server connection outliving a
+    transaction. SQLite keeps the default pool of its driver
+    """
+    if make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        return {}
+    if config["DB_PGBOUNCER"]:
+        return {"poolclass": InstrumentedNullPool}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+
+
+def init_app(flask_app):
+    """
+    sets SQLALCHEMY_ENGINE_OPTIONS unless the config already has them
+    """
+    flask_app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options(flask_app.config)
+    )
@@ -1,78 +1,129 @@
 """
     forms for logged in users
 """
+from datetime import timedelta
+from functools import lru_cache
 from flask_wtf import FlaskForm
-from wtforms.fields import DateField, SelectField, SelectMultipleField
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+from wtforms.fields import (
+    DateField,
+    IntegerField,
+    SelectField,
+    SelectMultipleField,
+)
 from wtforms.form import Form
-from wtforms.validators import DataRequired
-from wtforms_alchemy import model_form_factory
+from wtforms.validators import DataRequired, Optional
 from guineapigs import models
+from guineapigs.utils import local_today
 
-ModelForm = model_form_factory(FlaskForm)
 
-
-class GuineaPigForm(ModelForm):  # pylint: disable=too-few-public-methods
+@lru_cache(maxsize=None)
+def _model_form():
     """
-    fields:
-        - name: str
+    returns the base class of model forms. wtforms_alchemy is imported here
+    since it takes longer to import than the rest of the app
     """
+    from wtforms_alchemy import (  # pylint: disable=import-outside-toplevel
+        model_form_factory,
+    )
+
+    return model_form_factory(FlaskForm)
+
 
-    class Meta:  # pylint: disable=too-few-public-methods
+def _guinea_pig_form():
+    class GuineaPigForm(_model_form()):  # pylint: disable=too-few-public-methods
         """
-            maps to GuineaPig model
+        fields:
+            - name: str
         """
 
-        model = models.GuineaPig
+        class Meta:  # pylint: disable=too-few-public-methods
+            """
+                maps to GuineaPig model
+            """
 
+            model = models.GuineaPig
 
-class FoodTypeForm(ModelForm):  # pylint: disable=too-few-public-methods
-    """
-    fields:
-        - label: str
-        - recommendations: str
-    """
+    return GuineaPigForm
 
-    class Meta:  # pylint: disable=too-few-public-methods
+
+def _food_type_form():
+    class FoodTypeForm(_model_form()):  # pylint: disable=too-few-public-methods
         """
-            maps to FoodType model
+        fields:
+            - label: str
+            - recommendations: str
         """
 
-        model = models.FoodType
+        class Meta:  # pylint: disable=too-few-public-methods
+            """
+                maps to FoodType model
+            """
 
+            model = models.FoodType
+
+    return FoodTypeForm
 
-class FoodEntryForm(ModelForm):  # pylint: disable=too-few-public-methods
-    """
-    fields:
-        - food_type_id: int
-        - guinea_pigs_ids: [int]
-    """
 
-    class Meta:  # pylint: disable=too-few-public-methods
+def _food_entry_form():
+    class FoodEntryForm(_model_form()):  # pylint: disable=too-few-public-methods
         """
-            maps to FoodEntry model
+        fields:
+            - food_type_id: int
+            - guinea_pigs_ids: [int]
         """
 
-        model = models.FoodEntry
+        class Meta:  # pylint: disable=too-few-public-methods
+            """
+                maps to FoodEntry model
+            """
 
-    food_type_id = SelectField("food", coerce=int)
-    guinea_pig_ids = SelectMultipleField("guinea pigs", coerce=int)
+            model = models.FoodEntry
 
+        food_type_id = SelectField("food", coerce=int)
+        guinea_pig_ids = SelectMultipleField("guinea pigs", coerce=int)
 
-class WeightEntryForm(ModelForm):  # pylint: disable=too-few-public-methods
-    """
-    fields:
-        - value: float
-        - guinea_pigs_id: int
-    """
+    return FoodEntryForm
 
-    class Meta:  # pylint: disable=too-few-public-methods
+
+def _weight_entry_form():
+    class WeightEntryForm(_model_form()):  # pylint: disable=too-few-public-methods
         """
-            maps to WeightEntry model
+        fields:
+            - value: float
+            - guinea_pigs_id: int
         """
 
-        model = models.WeightEntry
+        class Meta:  # pylint: disable=too-few-public-methods
+            """
+                maps to WeightEntry model
+            """
+
+            model = models.WeightEntry
+
+        guinea_pig_id = SelectField("guinea Pigs", coerce=int)
+
+    return WeightEntryForm
+
 
-    guinea_pig_id = SelectField("guinea Pigs", coerce=int)
+# model forms, created on first use since wtforms_alchemy builds their
+# fields by introspecting the models {name: function returning the class}
+_MODEL_FORMS = {
+    "GuineaPigForm": _guinea_pig_form,
+    "FoodTypeForm": _food_type_form,
+    "FoodEntryForm": _food_entry_form,
+    "WeightEntryForm": _weight_entry_form,
+}
+
+
+def __getattr__(name):
+    """
+    creates model form name on first use
+    """
+    if name not in _MODEL_FORMS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    form = globals()[name] = _MODEL_FORMS[name]()
+    return form
 
 
 class HistoryForm(Form):  # pylint: disable=too-few-public-methods
@@ -84,3 +135,58 @@ class HistoryForm(Form):  # pylint: disable=too-few-public-methods
 
     start = DateField(label="start", validators=[DataRequired()])
     end = DateField(label="end", validators=[DataRequired()])
+    default_days = 7
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        returns form filled from query string args, defaulting to the last
+        default_days days
+        """
+        form = cls(args)
+
+        if not (form.start.raw_data or form.end.raw_data):
+            form.start.data = local_today() - timedelta(days=cls.default_days - 1)
+            form.end.data = local_today()
+
+        return form
+
+
+class FoodFrequencyForm(HistoryForm):  # pylint: disable=too-few-public-methods
+    """
+    fields:
+        - start: date
+        - end: date
+    """
+
+    default_days = 30
+
+
+class WeightTrendForm(HistoryForm):  # pylint: disable=too-few-public-methods
+    """
+    fields:
+        - start: date
+        - end: date
+        - period: day, week or month
+        - guinea_pig_id: int (optional, every guinea pig by default)
+    """
+
+    period = SelectField(
+        "period",
+        choices=[("day", "day"), ("week", "week"), ("month", "month")],
+        default="week",
+    )
+    guinea_pig_id = IntegerField("guinea pig", validators=[Optional()])
+    default_days = 365
+
+
+class ImportForm(FlaskForm):  # pylint: disable=too-few-public-methods
+    """
+    fields:
+        - file: CSV or NDJSON file
+    """
+
+    file = FileField(
+        "csv or ndjson file",
+        validators=[FileRequired(), FileAllowed(["csv", "ndjson"], "csv or ndjson")],
+    )
@@ -1,29 +1,71 @@
 """
     web routes for logged in user
 """
-import heapq
+import io
+import os
+from functools import wraps
 from flask import (
+    abort,
     Blueprint,
+    current_app,
     jsonify,
     redirect,
     render_template,
     request,
+    Response,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required, logout_user
-from guineapigs import models
+from guineapigs import events as events_, history as history_, importer, models
+from guineapigs.cache import page_cache, reference_cache
 from guineapigs.extensions import db
 from guineapigs.private import forms
+from guineapigs.replica import use_replica
 from guineapigs.utils import (
     beginning_of_day_utc,
-    beginning_of_week_utc,
-    date_to_datetime,
+    decode_cursor,
+    local_date_to_utc,
+    local_today,
     next_day,
+    stream_template,
+    to_local_date,
 )
 
 blueprint = Blueprint("private", __name__, static_folder="../static")
 
 
+def cached_page(*tables):
+    """
+    decorates a view to cache the page it renders under the user, the URL,
+    today's date and the data versions of tables, so any write to them
+    (which bumps their version) makes the next request render it again
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = models.DataVersion.get_all()
+            key = (
+                current_user.id,
+                request.full_path,
+                local_today(),
+                tuple(versions.get(table, 0) for table in tables),
+            )
+            return page_cache.get_or_set(key, lambda: view(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def _is_xhr():
+    """
+    returns whether the request was sent by script.js rather than a form
+    """
+    return request.headers.get("X-Requested-With") == "XMLHttpRequest"
+
+
 @blueprint.route("/logout")
 @login_required
 def logout_view():
@@ -35,6 +77,7 @@ def logout_view():
 
 
 @blueprint.route("/")
+@use_replica
 @login_required
 def dashboard():
     """
@@ -43,84 +86,111 @@ def dashboard():
     """
     return render_template(
         "dashboard.html",
-        food_entries=models.FoodEntry.get_in_time_range(beginning_of_day_utc()),
+        food_entries=models.FoodEntry.get_in_time_range(
+            beginning_of_day_utc(), eager=True
+        ),
         vitamin_c=models.VitaminCEntry.get_today(),
     )
 
 
-@blueprint.route("/history", methods=["GET", "POST"])
+@blueprint.route("/history")
+@use_replica
 @login_required
 def history():
     """
-    displays history of all entries
+    displays history of all entries, newest first, one page at a time
     """
-    today = beginning_of_day_utc()
-    beginning_of_week = beginning_of_week_utc()
-    form = forms.HistoryForm(request.form)
+    form = forms.HistoryForm.from_args(request.args)
+    entries = []
+    next_cursor = None
+    if form.validate():
+        entries, next_cursor = history_.paginate(
+            local_date_to_utc(form.start.data),
+            local_date_to_utc(next_day(form.end.data)),
+            decode_cursor(request.args.get("before")),
+            current_app.config["HISTORY_PAGE_SIZE"],
+        )
 
-    start = end = None
+    return stream_template(
+        "history.html", form=form, entries=entries, next_cursor=next_cursor
+    )
 
-    if request.method == "GET":
-        start = beginning_of_week
-        end = today
-        form.start.data = beginning_of_week.date()
-        form.end.data = today.date()
-    elif form.validate():
-        start = date_to_datetime(form.start.data)
-        end = date_to_datetime(form.end.data)
 
-    entries = []
-    if start and end:
-        end = next_day(end)
-        food_entries = models.FoodEntry.get_in_time_range(start, end)
-        weight_entries = models.WeightEntry.get_in_time_range(start, end)
-        vitamin_c_entries = models.VitaminCEntry.get_in_time_range(start, end)
-
-        food_entries = (
-            (
-                f.utc_date,
-                "🍽️",
-                f.food_type.label,
-                ", ".join(gp.name for gp in f.guinea_pigs),
-                f.user.name,
-            )
-            for f in food_entries
-        )
-        weight_entries = (
-            (w.utc_date, "⚖️", w.value, w.guinea_pig.name, w.user.name,)
-            for w in weight_entries
-        )
-        vitamin_c_entries = (
-            (v.utc_date, "🌻", "", "", v.user.name,) for v in vitamin_c_entries
-        )
-        entries = heapq.merge(food_entries, weight_entries, vitamin_c_entries)
+@blueprint.route("/history/export.<any(csv, ndjson):format_>")
+@use_replica
+@login_required
+def history_export(format_):
+    """
+    streams every entry in the history time range as CSV or NDJSON
+    """
+    form = forms.HistoryForm.from_args(request.args)
+    if not form.validate():
+        return abort(400)
 
-    return render_template("history.html", form=form, entries=entries)
+    rows = history_.get_all(
+        local_date_to_utc(form.start.data), local_date_to_utc(next_day(form.end.data))
+    )
+    if format_ == "csv":
+        body, mimetype = history_.to_csv(rows), "text/csv"
+    else:
+        body, mimetype = history_.to_ndjson(rows), "application/x-ndjson"
+
+    filename = f"history-{form.start.data}-{form.end.data}.{format_}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
 @blueprint.route("/statistics")
+@use_replica
 @login_required
+@cached_page("guinea_pig", "food_type", "food_entry", "weight_entry")
 def statistics():
     """
-    displays statistics page with weight info and food stats
+    displays statistics page with weight info, food stats and how often each
+    food was fed in a time range (the last 30 days by default)
     """
+    form = forms.FoodFrequencyForm.from_args(request.args)
     return render_template(
         "statistics.html",
         status=models.FoodEntry.get_statistics(),
         weights=models.WeightEntry.get_most_recent(),
+        form=form,
+        frequencies=models.FoodRollup.get_frequencies(form.start.data, form.end.data)
+        if form.validate()
+        else [],
+        guinea_pigs=models.GuineaPig.get_all(),
     )
 
 
 @blueprint.route("/settings")
+@use_replica
 @login_required
+@cached_page("guinea_pig", "food_type")
 def settings():
     """
     displays settings page to edit guinea pigs and food types
     """
     return render_template(
         "settings.html",
-        food_types=models.FoodType.query.order_by("label").all(),
-        guinea_pigs=models.GuineaPig.query.order_by(models.GuineaPig.name).all(),
+        food_types=models.FoodType.get_all(),
+        guinea_pigs=models.GuineaPig.get_all(),
+    )
+
+
+@blueprint.route("/events")
+@login_required
+def events():
+    """
+    streams dashboard changes (food entries added, edited or deleted and
+    vitamin c toggled) as server-sent events
+    """
+    return Response(
+        events_.stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -128,15 +198,16 @@ def settings():
 @login_required
 def vitaminc():
     """
-    adds vitaminc entry if it doesn't exist already
+    adds today's vitamin c entry, or deletes it if it exists already
     """
-    if models.VitaminCEntry.get_today():
-        models.VitaminCEntry.delete_today()
-    else:
-        entry = models.VitaminCEntry()
-        entry.user = current_user
-        db.session.add(entry)
+    vitamin_c = models.VitaminCEntry.toggle_today(current_user)
+    events_.publish(
+        "vitamin_c",
+        html=render_template("partials/vitamin_c.html", vitamin_c=vitamin_c),
+    )
     db.session.commit()
+    if _is_xhr():
+        return jsonify(status="ok")
     return redirect(url_for("private.dashboard"))
 
 
@@ -149,12 +220,16 @@ def delete_food_entry():
     """
     if food_entry_id := request.form.get("id"):
         if food_entry_id.isdecimal():
-            entry = models.FoodEntry.query.filter(
-                models.FoodEntry.id == int(food_entry_id)
-            )
-            entry.first().guinea_pigs = []
-            entry.delete()
-            db.session.commit()
+            food_entry_id = int(food_entry_id)
+            if deleted := models.FoodEntry.delete_by_id(food_entry_id):
+                food_type_id, utc_date = deleted
+                local_day = to_local_date(utc_date)
+                models.FoodStatistic.remove_entry(food_type_id)
+                models.FoodRollup.refresh(local_day, local_day, [food_type_id])
+                events_.publish("food_entry_deleted", id=food_entry_id)
+                db.session.commit()
+    if _is_xhr():
+        return jsonify(status="ok")
     return redirect(url_for("private.dashboard"))
 
 
@@ -167,15 +242,11 @@ def food_entry_form(id_=None):
     """
     form = forms.FoodEntryForm()
     form.food_type_id.choices = [
-        (food_entry.id, food_entry.label)
-        for food_entry in models.FoodType.query.order_by(models.FoodType.label)
-        .filter(models.FoodType.is_hidden == False) # pylint: disable=singleton-comparison
-        .all()
-    ]
-    form.guinea_pig_ids.choices = [
-        (guinea_pig.id, guinea_pig.name)
-        for guinea_pig in models.GuineaPig.query.order_by(models.GuineaPig.name).all()
+        (food_type.id, food_type.label)
+        for food_type in models.FoodType.get_all()
+        if not food_type.is_hidden
     ]
+    form.guinea_pig_ids.choices = list(models.GuineaPig.get_all())
 
     entry = None
     if id_:
@@ -183,21 +254,39 @@ def food_entry_form(id_=None):
 
     if form.validate_on_submit():
 
+        previous_food_type_id = entry.food_type_id if entry else None
         entry = entry or models.FoodEntry()
         entry.food_type_id = form.food_type_id.data
         entry.notes = form.notes.data
         entry.user = current_user
-        entry.guinea_pigs = models.GuineaPig.query.filter(
-            models.GuineaPig.id.in_(form.guinea_pig_ids.data)
-        ).all()
         db.session.add(entry)
+        db.session.flush()
+        # the ids were validated against the choices, no need to load them
+        models.FoodEntry.link_guinea_pigs(
+            entry.id, form.guinea_pig_ids.data, replace=bool(previous_food_type_id)
+        )
+        if previous_food_type_id != entry.food_type_id:
+            if previous_food_type_id:
+                models.FoodStatistic.remove_entry(previous_food_type_id)
+            models.FoodStatistic.add_entry(entry.food_type_id, entry.utc_date)
+        models.FoodRollup.refresh(
+            entry.local_day,
+            entry.local_day,
+            {entry.food_type_id, previous_food_type_id} - {None},
+        )
+        events_.publish(
+            "food_entry",
+            id=entry.id,
+            today=entry.utc_date >= beginning_of_day_utc(),
+            html=render_template("partials/food_entry.html", entry=entry),
+        )
         db.session.commit()
         return jsonify(status="ok")
 
     if entry:
         form.food_type_id.data = entry.food_type_id
         form.notes.data = entry.notes
-        form.guinea_pig_ids.data = [guinea_pig.id for guinea_pig in entry.guinea_pig]
+        form.guinea_pig_ids.data = [guinea_pig.id for guinea_pig in entry.guinea_pigs]
     else:
         form.guinea_pig_ids.data = [
             guinea_pig[0] for guinea_pig in form.guinea_pig_ids.choices
@@ -214,21 +303,24 @@ def weight_entry_form(id_=None):
     insert/edit a weight entry
     """
     form = forms.WeightEntryForm()
-    form.guinea_pig_id.choices = [
-        (guinea_pig.id, guinea_pig.name)
-        for guinea_pig in models.GuineaPig.query.order_by(models.GuineaPig.name).all()
-    ]
+    form.guinea_pig_id.choices = list(models.GuineaPig.get_all())
 
     entry = None
     if id_:
         entry = models.WeightEntry.query.filter(models.WeightEntry.id == id_).first()
 
     if form.validate_on_submit():
+        days = set()
+        if entry:
+            days.add(entry.rollup_key)
         entry = entry or models.WeightEntry()
         entry.value = float(form.value.data)
         entry.guinea_pig_id = form.guinea_pig_id.data
         entry.user = current_user
         db.session.add(entry)
+        db.session.flush()
+        days.add(entry.rollup_key)
+        models.WeightRollup.refresh(days)
         db.session.commit()
         return jsonify(status="ok")
 
@@ -240,7 +332,7 @@ def weight_entry_form(id_=None):
 
 
 @blueprint.route("/guinea_pig/add", methods=["GET", "POST"])
-@blueprint.route("/guinea_pig/edit/<int:id>", methods=["GET", "POST"])
+@blueprint.route("/guinea_pig/edit/<int:id_>", methods=["GET", "POST"])
 @login_required
 def guinea_pig_form(id_=None):
     """
@@ -256,6 +348,7 @@ def guinea_pig_form(id_=None):
         guinea_pig.name = form.name.data
         db.session.add(guinea_pig)
         db.session.commit()
+        reference_cache.clear()
         return jsonify(status="ok")
 
     if guinea_pig:
@@ -285,6 +378,7 @@ def food_type_form(id_=None):
         food_entry.in_statistics = form.in_statistics.data
         db.session.add(food_entry)
         db.session.commit()
+        reference_cache.clear()
         return jsonify(status="ok")
 
     if food_entry:
@@ -294,3 +388,32 @@ def food_type_form(id_=None):
         form.in_statistics.data = food_entry.in_statistics
 
     return render_template("forms/food_type_form.html", food_type_form=form)
+
+
+@blueprint.route("/import", methods=["GET", "POST"])
+@login_required
+def import_entries():
+    """
+    bulk imports food and weight entries from an uploaded CSV or NDJSON file
+    """
+    form = forms.ImportForm()
+
+    if form.validate_on_submit():
+        upload = form.file.data
+        format_ = os.path.splitext(upload.filename)[1].lstrip(".").lower()
+        try:
+            result = importer.import_entries(
+                importer.read_rows(
+                    io.TextIOWrapper(upload.stream, encoding="utf-8", newline=""),
+                    format_,
+                ),
+                current_user.id,
+            )
+        except ValueError as error:
+            form.file.errors.append(str(error))
+        else:
+            events_.publish("reload")
+            db.session.commit()
+            return jsonify(status="ok", **result.as_dict())
+
+    return render_template("forms/import_form.html", import_form=form)
@@ -3,6 +3,9 @@
 """
 from flask import abort, Blueprint, render_template, redirect, request, url_for
 from flask_login import current_user, login_user
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from guineapigs.cache import user_cache
 from guineapigs.models import User
 from guineapigs.extensions import db, login_manager
 from guineapigs.utils import is_safe_url
@@ -16,9 +19,27 @@ login_manager.login_view = "public.login"
 @login_manager.user_loader
 def user_loader(user_id):
     """
-    Locates user in database using its id
+    Locates user in database using its id, users seen recently by this
+    worker are attached to the session from the cache without a query
     """
-    return User.query.filter(User.id == user_id).first()
+    if cached := user_cache.get(user_id):
+        return db.session.merge(cached, load=False)
+
+    user = User.query.filter(User.id == user_id).first()
+    if user:
+        cached = User(id=user.id, name=user.name)
+        make_transient_to_detached(cached)
+        user_cache.set(user_id, cached)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(_mapper, _connection, user):
+    """
+    Drops changed users from the user cache
+    """
+    user_cache.pop(user.get_id())
 
 
 @blueprint.route("/login", methods=["GET", "POST"])
@@ -0,0 +1,143 @@
+"""
+    optional read replica (SQLALCHEMY_REPLICA_URI) for GET views
+
+    views decorated with use_replica read from the replica unless
+        - the request already wrote (the rest of it reads from the primary)
+        - the user wrote less than REPLICA_MAX_LAG seconds ago, so they
+          read their own writes
+        - the replica lags behind by more than REPLICA_MAX_LAG seconds or
+          can't be reached (checked every REPLICA_LAG_CHECK_INTERVAL
+          seconds per worker)
+    everything else, writes included, goes to the primary
+"""
+import logging
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.sql.dml import UpdateBase
+
+BIND = "replica"
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(SignallingSession):
+    """
+    session sending reads of use_replica views to the replica, until it
+    writes anything
+    """
+
+    def __init__(self, db, *args, **kwargs):
+        super().__init__(db, *args, **kwargs)
+        self.db = db
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.wrote = True
+        if not self.wrote and _replica_allowed(self.db, self.app):
+            return self.db.get_engine(self.app, bind=BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    SQLAlchemy extension using RoutingSession
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class _LagCheck:  # pylint: disable=too-few-public-methods
+    """
+    replica lag in seconds, measured at most every interval seconds
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._lag = 0.0
+
+    def __call__(self, engine, interval):
+        with self._lock:
+            if time.monotonic() - self._checked >= interval:
+                self._checked = time.monotonic()
+                self._lag = _measure_lag(engine)
+            return self._lag
+
+
+def _measure_lag(engine):
+    """
+    returns how far engine's database replays behind its primary, inf if it
+    can't be reached
+    """
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    try:
+        with engine.connect() as connection:
+            lag = connection.scalar(
+                "SELECT CASE "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+                "END"
+            )
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("replica unavailable, reading from the primary")
+        return float("inf")
+    return float(lag or 0)
+
+
+replica_lag = _LagCheck()
+
+
+def _replica_allowed(db, app):
+    """
+    returns whether the current request may read from the replica
+    """
+    if not (has_request_context() and g.get("use_replica")):
+        return False
+    max_lag = app.config["REPLICA_MAX_LAG"]
+    if time.time() - session.get("wrote_at", 0) < max_lag:
+        return False
+    engine = db.get_engine(app, bind=BIND)
+    return replica_lag(engine, app.config["REPLICA_LAG_CHECK_INTERVAL"]) <= max_lag
+
+
+def use_replica(view):
+    """
+    decorates a GET view to read from the replica (if one is configured)
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = bool(current_app.config["SQLALCHEMY_REPLICA_URI"])
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _remember_write(response):
+    """
+    records when the user last wrote so their next reads see it
+    """
+    scoped_session = current_app.extensions["sqlalchemy"].db.session
+    if scoped_session.registry.has() and scoped_session().wrote:
+        session["wrote_at"] = time.time()
+    return response
+
+
+def init_app(app):
+    """
+    adds the replica bind when SQLALCHEMY_REPLICA_URI is set, call before
+    the SQLAlchemy extension's init_app
+    """
+    if uri := app.config["SQLALCHEMY_REPLICA_URI"]:
+        app.config["SQLALCHEMY_BINDS"] = {
+            **(app.config.get("SQLALCHEMY_BINDS") or {}),
+            BIND: uri,
+        }
+        app.after_request(_remember_write)
@@ -1,11 +1,64 @@
 $(document).ready(function() {
+	// dashboard changes pushed by the server, patched into the page
+	const foodEntries = $('#food-entries');
+	let live = false;
+	if (foodEntries.length && window.EventSource) {
+		const source = new EventSource(foodEntries.data('events'));
+		source.onopen = () => { live = true; };
+		source.onerror = () => { live = false; };
+		source.onmessage = message => {
+			const event = JSON.parse(message.data);
+			if (event.type == 'food_entry') {
+				const entry = $('#food-entry-' + event.id);
+				if (entry.length) {
+					entry.replaceWith(event.html);
+				}
+				else if (event.today) {
+					foodEntries.prepend(event.html);
+				}
+			}
+			else if (event.type == 'food_entry_deleted') {
+				$('#food-entry-' + event.id).remove();
+			}
+			else if (event.type == 'vitamin_c') {
+				$('#vitamin-c').replaceWith(event.html);
+			}
+			else if (event.type == 'reload') {
+				location.reload();
+			}
+			$('#no-food').toggle(!foodEntries.children('.food-entry').length);
+		};
+	}
+
+	$(document).on('submit', '.delete-food-entry', function(event) {
+		if (live) {
+			event.preventDefault();
+			$.post(this.action, $(this).serialize());
+		}
+	});
+
+	$(document).on('click', '#vitamin-c-toggle', function(event) {
+		if (live) {
+			event.preventDefault();
+			$.get(this.href);
+		}
+	});
+
 	function sendForm(url) {
 		return function(event) {
 			event.preventDefault();
-			$.post(url, data=$('#modal-form').serialize(), function(data) {
+			$.ajax({
+				url: url,
+				type: 'POST',
+				data: new FormData($('#modal-form')[0]),
+				processData: false,
+				contentType: false,
+			}).done(function(data) {
 				if (data.status == 'ok') {
 					$('#modal').modal('hide');
-					location.reload();
+					if (!live) {
+						location.reload();
+					}
 				}
 				else {
 					$('#modal-content').html(data);
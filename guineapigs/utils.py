@@ -2,25 +2,51 @@
     utitlities to make datetime work easier
 """
 from datetime import datetime, time, timedelta
+from functools import lru_cache
 from urllib.parse import urlparse, urljoin
-from flask import current_app as app
+from flask import (
+    before_render_template,
+    current_app as app,
+    g,
+    Response,
+    stream_with_context,
+    template_rendered,
+)
 import pytz
 
+# pieces of template output stream_template sends at once
+STREAM_BUFFER_SIZE = 256
 
-def beginning_of_day_utc():
+
+def local_today():
     """
-    returns the timestamp for the beginning
-    of current day in configured timezone
+    returns the current date in configured timezone
+    """
+    return datetime.now(app.config["TIMEZONE"]).date()
+
+
+def local_date_to_utc(date):
+    """
+    returns the utc timestamp for the beginning of date in configured timezone
     """
     return (
-        datetime.now()
-        .astimezone(app.config["TIMEZONE"])
-        .replace(hour=0, minute=0, second=0, microsecond=0)
+        app.config["TIMEZONE"]
+        .localize(date_to_datetime(date))
         .astimezone(pytz.utc)
         .replace(tzinfo=None)
     )
 
 
+def beginning_of_day_utc():
+    """
+    returns the timestamp for the beginning
+    of current day in configured timezone (computed once per request)
+    """
+    if "beginning_of_day_utc" not in g:
+        g.beginning_of_day_utc = local_date_to_utc(local_today())
+    return g.beginning_of_day_utc
+
+
 def date_to_datetime(date):
     """
         converts date object to datetime object (with time variables set to zero)
@@ -42,15 +68,82 @@ def next_day(date):
     return date + timedelta(days=1)
 
 
+class LocalTime:
+    """
+    converts naive utc datetimes to timezone, memoizing the utc offset of
+    every utc hour seen so bulk conversions skip pytz transition lookups
+    """
+
+    max_hours = 24 * 366 * 2
+
+    def __init__(self, timezone):
+        self.timezone = timezone
+        self._hours = {}
+
+    def _hour(self, key, datetime_instance):
+        """
+        returns (tzinfo, utc offset) in effect for the whole hour of
+        datetime_instance, (None, None) if it changes within the hour
+        """
+        if len(self._hours) >= self.max_hours:
+            self._hours.clear()
+        hour = datetime_instance.replace(minute=0, second=0, microsecond=0)
+        start = pytz.utc.localize(hour).astimezone(self.timezone)
+        end = pytz.utc.localize(
+            hour + timedelta(hours=1, microseconds=-1)
+        ).astimezone(self.timezone)
+        if start.tzinfo is end.tzinfo:
+            self._hours[key] = start.tzinfo, start.utcoffset()
+        else:
+            self._hours[key] = None, None
+        return self._hours[key]
+
+    def to_local(self, datetime_instance):
+        """
+        converts naive utc datetime to timezone
+        """
+        key = datetime_instance.toordinal() * 24 + datetime_instance.hour
+        tzinfo, offset = self._hours.get(key) or self._hour(key, datetime_instance)
+        if tzinfo is None:
+            return datetime_instance.replace(tzinfo=pytz.utc).astimezone(
+                self.timezone
+            )
+        return (datetime_instance + offset).replace(tzinfo=tzinfo)
+
+    def strftime(self, datetime_instance, str_format):
+        """
+        converts to timezone and then formats
+        """
+        return self.to_local(datetime_instance).strftime(str_format)
+
+
+@lru_cache(maxsize=None)
+def local_time(timezone):
+    """
+    returns the shared LocalTime converter for timezone
+    """
+    return LocalTime(timezone)
+
+
+def to_local(datetime_instance):
+    """
+    converts naive utc datetime to configured timezone
+    """
+    return local_time(app.config["TIMEZONE"]).to_local(datetime_instance)
+
+
+def to_local_date(datetime_instance):
+    """
+    returns the date of naive utc datetime in configured timezone
+    """
+    return to_local(datetime_instance).date()
+
+
 def strftime(datetime_instance, str_format):
     """
     converts to correct timezone and then formats
     """
-    return (
-        datetime_instance.replace(tzinfo=pytz.utc)
-        .astimezone(app.config["TIMEZONE"])
-        .strftime(str_format)
-    )
+    return to_local(datetime_instance).strftime(str_format)
 
 
 def is_safe_url(target, host_url):
@@ -60,3 +153,41 @@ def is_safe_url(target, host_url):
     ref_url = urlparse(host_url)
     test_url = urlparse(urljoin(host_url, target))
     return test_url.scheme in ("http", "https") and ref_url.netloc == test_url.netloc
+
+
+def encode_cursor(utc_date, id_, kind):
+    """
+    encodes an (utc_date, id, kind) keyset pagination cursor for use in URLs
+    """
+    return f"{utc_date.isoformat()}_{id_}_{kind}"
+
+
+def decode_cursor(cursor):
+    """
+    decodes a cursor made by encode_cursor, returns None if it's malformed
+    """
+    try:
+        utc_date, id_, kind = (cursor or "").split("_", 2)
+        return datetime.fromisoformat(utc_date), int(id_), kind
+    except ValueError:
+        return None
+
+
+def stream_template(template_name, **context):
+    """
+    like flask.render_template but sends the page as it is being rendered
+    """
+    flask_app = app._get_current_object()  # pylint: disable=protected-access
+    flask_app.update_template_context(context)
+    template = flask_app.jinja_env.get_template(template_name)
+
+    def generate():
+        before_render_template.send(flask_app, template=template, context=context)
+        # Jinja yields every bit of text and expression on its own, send
+        # them in batches
+        stream = template.stream(context)
+        stream.enable_buffering(STREAM_BUFFER_SIZE)
+        yield from stream
+        template_rendered.send(flask_app, template=template, context=context)
+
+    return Response(stream_with_context(generate()))
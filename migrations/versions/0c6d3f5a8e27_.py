@@ -0,0 +1,113 @@
+"""add food rollup table
+
+Revision ID: 0c6d3f5a8e27
+Revises: e41c8a7b2f90
+Create Date: 2026-10-17 19:26:02.871450
+
+"""
+from collections import Counter
+from itertools import groupby
+from alembic import op
+from flask import current_app
+import pytz
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0c6d3f5a8e27"
+down_revision = "e41c8a7b2f90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    food_rollup = op.create_table(
+        "food_rollup",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("local_day", sa.Date(), nullable=False),
+        sa.Column("food_type_id", sa.Integer(), nullable=False),
+        sa.Column("guinea_pig_id", sa.Integer(), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["food_type_id"], ["food_type.id"],),
+        sa.ForeignKeyConstraint(["guinea_pig_id"], ["guinea_pig.id"],),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "local_day",
+            "food_type_id",
+            "guinea_pig_id",
+            name="uq_food_rollup_local_day_food_type_id_guinea_pig_id",
+        ),
+    )
+    op.create_index(
+        "ix_food_rollup_local_day_food_type_id",
+        "food_rollup",
+        ["local_day", "food_type_id"],
+        unique=False,
+    )
+    # NULLs are distinct in the constraint above, totals need their own
+    op.create_index(
+        "uq_food_rollup_local_day_food_type_id_total",
+        "food_rollup",
+        ["local_day", "food_type_id"],
+        unique=True,
+        postgresql_where=sa.text("guinea_pig_id IS NULL"),
+        sqlite_where=sa.text("guinea_pig_id IS NULL"),
+    )
+
+    timezone = current_app.config["TIMEZONE"]
+    food_entry = sa.table(
+        "food_entry",
+        sa.column("id", sa.Integer()),
+        sa.column("utc_date", sa.DateTime()),
+        sa.column("food_type_id", sa.Integer()),
+    )
+    food_entries = sa.table(
+        "food_entries",
+        sa.column("food_entry_id", sa.Integer()),
+        sa.column("guinea_pig_id", sa.Integer()),
+    )
+    entries = op.get_bind().execute(
+        sa.select(
+            [
+                food_entry.c.id,
+                food_entry.c.utc_date,
+                food_entry.c.food_type_id,
+                food_entries.c.guinea_pig_id,
+            ]
+        )
+        .select_from(
+            food_entry.outerjoin(
+                food_entries, food_entries.c.food_entry_id == food_entry.c.id
+            )
+        )
+        .where(food_entry.c.utc_date.isnot(None))
+        .order_by(food_entry.c.id)
+    )
+    counts = Counter()
+    for _, rows in groupby(entries, key=lambda entry: entry[0]):
+        rows = list(rows)
+        _, utc_date, food_type_id, _ = rows[0]
+        local_day = pytz.utc.localize(utc_date).astimezone(timezone).date()
+        counts[local_day, food_type_id, None] += 1
+        for *_, guinea_pig_id in rows:
+            if guinea_pig_id is not None:
+                counts[local_day, food_type_id, guinea_pig_id] += 1
+    if counts:
+        op.bulk_insert(
+            food_rollup,
+            [
+                {
+                    "local_day": local_day,
+                    "food_type_id": food_type_id,
+                    "guinea_pig_id": guinea_pig_id,
+                    "count": count,
+                }
+                for (local_day, food_type_id, guinea_pig_id), count in counts.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_index("uq_food_rollup_local_day_food_type_id_total", "food_rollup")
+    op.drop_index("ix_food_rollup_local_day_food_type_id", table_name="food_rollup")
+    op.drop_table("food_rollup")
@@ -0,0 +1,39 @@
+"""add data version table
+
+Revision ID: 5b9e7f20c4d1
+Revises: a3d58e0c6b17
+Create Date: 2026-10-17 16:41:09.552803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b9e7f20c4d1"
+down_revision = "a3d58e0c6b17"
+branch_labels = None
+depends_on = None
+
+TABLES = (
+    "user",
+    "guinea_pig",
+    "food_type",
+    "food_entry",
+    "weight_entry",
+    "vitamin_c_entry",
+)
+
+
+def upgrade():
+    data_version = op.create_table(
+        "data_version",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(data_version, [{"name": name, "version": 0} for name in TABLES])
+
+
+def downgrade():
+    op.drop_table("data_version")
@@ -0,0 +1,69 @@
+"""add indexes for entry time range queries
+
+Revision ID: 7c2f1a9d3e45
+Revises: 4d3db79640c9
+Create Date: 2026-10-17 09:12:41.532019
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "7c2f1a9d3e45"
+down_revision = "4d3db79640c9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_food_entry_utc_date_id", "food_entry", ["utc_date", "id"], unique=False
+    )
+    op.create_index(
+        "ix_food_entry_food_type_id_utc_date",
+        "food_entry",
+        ["food_type_id", "utc_date"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_food_entry_user_id"), "food_entry", ["user_id"], unique=False
+    )
+    op.create_index(
+        "ix_weight_entry_utc_date_id", "weight_entry", ["utc_date", "id"], unique=False
+    )
+    op.create_index(
+        "ix_weight_entry_guinea_pig_id_utc_date",
+        "weight_entry",
+        ["guinea_pig_id", "utc_date"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_weight_entry_user_id"), "weight_entry", ["user_id"], unique=False
+    )
+    op.create_index(
+        "ix_vitamin_c_entry_utc_date_id",
+        "vitamin_c_entry",
+        ["utc_date", "id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_vitamin_c_entry_user_id"),
+        "vitamin_c_entry",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_food_entries_guinea_pig_id", "food_entries", ["guinea_pig_id"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_food_entries_guinea_pig_id", table_name="food_entries")
+    op.drop_index(op.f("ix_vitamin_c_entry_user_id"), table_name="vitamin_c_entry")
+    op.drop_index("ix_vitamin_c_entry_utc_date_id", table_name="vitamin_c_entry")
+    op.drop_index(op.f("ix_weight_entry_user_id"), table_name="weight_entry")
+    op.drop_index("ix_weight_entry_guinea_pig_id_utc_date", table_name="weight_entry")
+    op.drop_index("ix_weight_entry_utc_date_id", table_name="weight_entry")
+    op.drop_index(op.f("ix_food_entry_user_id"), table_name="food_entry")
+    op.drop_index("ix_food_entry_food_type_id_utc_date", table_name="food_entry")
+    op.drop_index("ix_food_entry_utc_date_id", table_name="food_entry")
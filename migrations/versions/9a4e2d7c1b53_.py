@@ -0,0 +1,38 @@
+"""partition entry tables by utc_date (PostgreSQL, ENTRY_PARTITION_PERIOD)
+
+Revision ID: 9a4e2d7c1b53
+Revises: 0c6d3f5a8e27
+Create Date: 2026-10-17 21:04:37.512903
+
+"""
+from alembic import op
+from flask import current_app
+from guineapigs import partitions
+
+
+# revision identifiers, used by Alembic.
+revision = "9a4e2d7c1b53"
+down_revision = "0c6d3f5a8e27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    period = current_app.config["ENTRY_PARTITION_PERIOD"]
+    if connection.dialect.name != "postgresql" or period not in partitions.PERIODS:
+        return
+    for table in partitions.TABLES:
+        if not partitions.is_partitioned(connection, table):
+            partitions.partition(
+                connection, table, period, current_app.config["ENTRY_PARTITIONS_AHEAD"]
+            )
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != "postgresql":
+        return
+    for table in partitions.TABLES:
+        if partitions.is_partitioned(connection, table):
+            partitions.unpartition(connection, table)
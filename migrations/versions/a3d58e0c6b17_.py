@@ -0,0 +1,38 @@
+"""add food statistics table
+
+Revision ID: a3d58e0c6b17
+Revises: 7c2f1a9d3e45
+Create Date: 2026-10-17 14:03:27.118440
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a3d58e0c6b17"
+down_revision = "7c2f1a9d3e45"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "food_statistic",
+        sa.Column("food_type_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("last_utc_date", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["food_type_id"], ["food_type.id"],),
+        sa.PrimaryKeyConstraint("food_type_id"),
+    )
+    op.execute(
+        "INSERT INTO food_statistic (food_type_id, count, last_utc_date) "
+        "SELECT food_type.id, count(food_entry.id), max(food_entry.utc_date) "
+        "FROM food_type LEFT OUTER JOIN food_entry "
+        "ON food_type.id = food_entry.food_type_id "
+        "GROUP BY food_type.id"
+    )
+
+
+def downgrade():
+    op.drop_table("food_statistic")
@@ -0,0 +1,67 @@
+"""one vitamin c entry per local day
+
+Revision ID: d5c81f3e6a29
+Revises: 9a4e2d7c1b53
+Create Date: 2026-10-17 22:03:18.640192
+
+"""
+from alembic import op
+from flask import current_app
+import pytz
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d5c81f3e6a29"
+down_revision = "9a4e2d7c1b53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("vitamin_c_entry", sa.Column("local_day", sa.Date(), nullable=True))
+
+    # keeps the first entry of each local day, the one the dashboard showed
+    timezone = current_app.config["TIMEZONE"]
+    vitamin_c_entry = sa.table(
+        "vitamin_c_entry",
+        sa.column("id", sa.Integer()),
+        sa.column("utc_date", sa.DateTime()),
+        sa.column("local_day", sa.Date()),
+    )
+    connection = op.get_bind()
+    days, duplicates = {}, []
+    for id_, utc_date in connection.execute(
+        sa.select([vitamin_c_entry.c.id, vitamin_c_entry.c.utc_date]).order_by(
+            vitamin_c_entry.c.utc_date, vitamin_c_entry.c.id
+        )
+    ):
+        if utc_date is None:
+            duplicates.append(id_)
+            continue
+        local_day = pytz.utc.localize(utc_date).astimezone(timezone).date()
+        if local_day in days:
+            duplicates.append(id_)
+        else:
+            days[local_day] = id_
+    if duplicates:
+        connection.execute(
+            vitamin_c_entry.delete().where(vitamin_c_entry.c.id.in_(duplicates))
+        )
+    if days:
+        connection.execute(
+            vitamin_c_entry.update()
+            .where(vitamin_c_entry.c.id == sa.bindparam("id_"))
+            .values(local_day=sa.bindparam("day")),
+            [{"id_": id_, "day": local_day} for local_day, id_ in days.items()],
+        )
+
+    with op.batch_alter_table("vitamin_c_entry") as batch_op:
+        batch_op.alter_column("local_day", existing_type=sa.Date(), nullable=False)
+        batch_op.create_unique_constraint("uq_vitamin_c_entry_local_day", ["local_day"])
+
+
+def downgrade():
+    with op.batch_alter_table("vitamin_c_entry") as batch_op:
+        batch_op.drop_constraint("uq_vitamin_c_entry_local_day", type_="unique")
+        batch_op.drop_column("local_day")
@@ -0,0 +1,76 @@
+"""add weight rollup table
+
+Revision ID: e41c8a7b2f90
+Revises: 5b9e7f20c4d1
+Create Date: 2026-10-17 18:12:45.203316
+
+"""
+from itertools import groupby
+from alembic import op
+from flask import current_app
+import pytz
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e41c8a7b2f90"
+down_revision = "5b9e7f20c4d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    weight_rollup = op.create_table(
+        "weight_rollup",
+        sa.Column("guinea_pig_id", sa.Integer(), nullable=False),
+        sa.Column("local_day", sa.Date(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("min_value", sa.Float(), nullable=False),
+        sa.Column("max_value", sa.Float(), nullable=False),
+        sa.Column("sum_value", sa.Float(), nullable=False),
+        sa.Column("last_utc_date", sa.DateTime(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["guinea_pig_id"], ["guinea_pig.id"],),
+        sa.PrimaryKeyConstraint("guinea_pig_id", "local_day"),
+    )
+
+    timezone = current_app.config["TIMEZONE"]
+    weight_entry = sa.table(
+        "weight_entry",
+        sa.column("guinea_pig_id", sa.Integer()),
+        sa.column("utc_date", sa.DateTime()),
+        sa.column("value", sa.Float()),
+    )
+    entries = op.get_bind().execute(
+        sa.select([weight_entry])
+        .where(weight_entry.c.utc_date.isnot(None))
+        .order_by(weight_entry.c.guinea_pig_id, weight_entry.c.utc_date)
+    )
+    rows = []
+    for (guinea_pig_id, local_day), day_entries in groupby(
+        entries,
+        key=lambda entry: (
+            entry[0],
+            pytz.utc.localize(entry[1]).astimezone(timezone).date(),
+        ),
+    ):
+        day_entries = list(day_entries)
+        values = [entry[2] for entry in day_entries]
+        rows.append(
+            {
+                "guinea_pig_id": guinea_pig_id,
+                "local_day": local_day,
+                "count": len(values),
+                "min_value": min(values),
+                "max_value": max(values),
+                "sum_value": sum(values),
+                "last_utc_date": day_entries[-1][1],
+                "last_value": values[-1],
+            }
+        )
+    if rows:
+        op.bulk_insert(weight_rollup, rows)
+
+
+def downgrade():
+    op.drop_table("weight_rollup")
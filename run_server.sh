@@ -1,4 +1,8 @@
 #! /bin/sh
 source .env/bin/activate
 [ -z "$HOST" ] && HOST="127.0.0.1:8000"
-gunicorn guineapigs:app -b "$HOST"
+[ -z "$THREADS" ] && THREADS=8
+# workers fork from one preloaded app, threads keep them responsive while
+# dashboards hold their event streams open
+gunicorn "guineapigs:create_app()" -b "$HOST" --preload \
+    --worker-class gthread --threads "$THREADS"
@@ -0,0 +1,106 @@
+"""
+    fixtures running the app on an in-memory SQLite database
+"""
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+# pylint: disable=wrong-import-position
+from guineapigs import create_app, models
+from guineapigs.cache import page_cache, reference_cache, user_cache
+from guineapigs.config import Config
+from guineapigs.extensions import db
+
+
+class TestConfig(Config):  # pylint: disable=too-few-public-methods
+    """
+    in-memory database, no CSRF tokens or secure cookies
+    """
+
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    WTF_CSRF_ENABLED = False
+    SESSION_COOKIE_SECURE = False
+    REMEMBER_COOKIE_SECURE = False
+
+
+# data_version rows inserted by the migration that adds the table
+VERSIONED_TABLES = (
+    "user",
+    "guinea_pig",
+    "food_type",
+    "food_entry",
+    "weight_entry",
+    "vitamin_c_entry",
+)
+
+
+def create_tables():
+    """
+    creates the tables with the rows the migrations insert
+    """
+    db.create_all()
+    db.session.execute(  # pylint: disable=no-member
+        models.DataVersion.__table__.insert(),
+        [{"name": name, "version": 0} for name in VERSIONED_TABLES],
+    )
+    db.session.commit()  # pylint: disable=no-member
+
+
+def clear_caches():
+    """
+    empties the per worker caches so every request queries what it needs
+    """
+    user_cache.clear()
+    reference_cache.clear()
+    page_cache.clear()
+
+
+@pytest.fixture
+def app():
+    """
+    app with an empty database
+    """
+    flask_app = create_app(TestConfig)
+    with flask_app.app_context():
+        create_tables()
+        clear_caches()
+        yield flask_app
+        db.session.remove()  # pylint: disable=no-member
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):  # pylint: disable=redefined-outer-name
+    """
+    test client logged in as "test"
+    """
+    test_client = app.test_client()
+    test_client.post("/login", data={"name": "test"})
+    return test_client
+
+
+@pytest.fixture
+def statements():
+    """
+    context manager yielding the list of SQL statements run inside it
+    """
+
+    @contextmanager
+    def record():
+        executed = []
+
+        def before_cursor_execute(_conn, _cursor, statement, *_args):
+            executed.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield executed
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+    return record
@@ -0,0 +1,32 @@
+"""
+    compressed responses
+"""
+from guineapigs import models
+from guineapigs.extensions import db
+
+
+def test_compressed_responses_weaken_the_etag(client):
+    food_type = models.FoodType(label="hay")
+    db.session.add_all(  # pylint: disable=no-member
+        [models.FoodEntry(food_type=food_type, notes="x" * 50) for _ in range(20)]
+    )
+    db.session.commit()  # pylint: disable=no-member
+
+    identity = client.get("/api/history")
+    assert "Content-Encoding" not in identity.headers
+    etag, weak = identity.get_etag()
+    assert not weak
+
+    gzip = {"Accept-Encoding": "gzip"}
+    compressed = client.get("/api/history", headers=gzip)
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.get_etag() == (etag, True)
+
+    revalidated = client.get(
+        "/api/history", headers={"If-None-Match": f'W/"{etag}"', **gzip}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.get_etag() == (etag, True)
+    revalidated = client.get("/api/history", headers={"If-None-Match": f'"{etag}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.get_etag() == (etag, False)
@@ -0,0 +1,55 @@
+"""
+    counters kept by concurrent first writes
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from guineapigs import models
+from guineapigs.extensions import db
+
+
+@contextmanager
+def race(table, row):
+    """
+    makes another request insert row into table right after the first
+    update of table finds nothing to update
+    """
+    raced = []
+
+    def after_cursor_execute(conn, cursor, statement, *_args):
+        if (
+            not raced
+            and statement.startswith(f"UPDATE {table.name} ")
+            and not cursor.rowcount
+        ):
+            raced.append(row)
+            conn.execute(table.insert(), row)
+
+    event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield
+    finally:
+        event.remove(Engine, "after_cursor_execute", after_cursor_execute)
+    assert raced
+
+
+def test_concurrent_first_entries_are_both_counted(app):
+    food_type = models.FoodType(label="hay")
+    db.session.add(food_type)  # pylint: disable=no-member
+    db.session.commit()  # pylint: disable=no-member
+    utc_date = datetime(2020, 1, 1)
+    with race(
+        models.FoodStatistic.__table__,
+        {"food_type_id": food_type.id, "count": 1, "last_utc_date": utc_date},
+    ):
+        models.FoodStatistic.add_entry(food_type.id, utc_date)
+        db.session.commit()  # pylint: disable=no-member
+    assert models.FoodStatistic.query.one().count == 2
+
+
+def test_concurrent_first_bumps_are_both_counted(app):
+    with race(models.DataVersion.__table__, {"name": "kale", "version": 1}):
+        models.DataVersion.bump("kale")
+        db.session.commit()  # pylint: disable=no-member
+    assert models.DataVersion.get_all()["kale"] == 2
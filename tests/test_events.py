@@ -0,0 +1,24 @@
+"""
+    server-sent events
+"""
+
+
+def events(client):
+    """
+    returns the chunks of an /events response, which must end
+    """
+    response = client.get("/events", buffered=False)
+    try:
+        return list(response.response)
+    finally:
+        response.close()
+
+
+def test_streams_end_after_the_timeout(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "EVENTS_STREAM_TIMEOUT", 0)
+    assert events(client) == [b"retry: 5000\n\n"]
+
+
+def test_full_workers_ask_browsers_to_retry_later(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "EVENTS_MAX_STREAMS", 0)
+    assert events(client) == [b"retry: 30000\n\n"]
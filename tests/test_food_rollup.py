@@ -0,0 +1,24 @@
+"""
+    daily food rollup
+"""
+from datetime import datetime
+from guineapigs import models
+from guineapigs.extensions import db
+from guineapigs.utils import to_local_date
+
+
+def test_frequencies_count_guinea_pigs_with_the_same_name_apart(app):
+    first, second = models.GuineaPig(name="pig"), models.GuineaPig(name="pig")
+    food_type = models.FoodType(label="hay")
+    entry = models.FoodEntry(
+        utc_date=datetime(2020, 1, 1, 12), food_type=food_type, guinea_pigs=[first]
+    )
+    db.session.add_all([second, entry])  # pylint: disable=no-member
+    db.session.flush()  # pylint: disable=no-member
+    day = to_local_date(entry.utc_date)
+    models.FoodRollup.refresh()
+    models.FoodRollup.refresh(day, day, [food_type.id])
+
+    (frequency,) = models.FoodRollup.get_frequencies(day, day)
+    assert frequency.count == 1
+    assert frequency.guinea_pigs == {first.id: 1}
@@ -0,0 +1,44 @@
+"""
+    keyset pagination of the history
+"""
+import html
+import re
+from datetime import datetime
+from guineapigs import models
+from guineapigs.extensions import db
+
+
+def test_pages_keep_entries_with_the_same_date_and_id(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "HISTORY_PAGE_SIZE", 1)
+    user = models.User.query.filter_by(name="test").one()
+    guinea_pig = models.GuineaPig(name="pig")
+    food_type = models.FoodType(label="hay")
+    db.session.add_all([guinea_pig, food_type])  # pylint: disable=no-member
+    db.session.flush()  # pylint: disable=no-member
+    utc_date = datetime(2020, 1, 1, 12)
+    db.session.add_all(  # pylint: disable=no-member
+        [
+            models.FoodEntry(
+                id=1, utc_date=utc_date, food_type_id=food_type.id, user=user
+            ),
+            models.WeightEntry(
+                id=1,
+                utc_date=utc_date,
+                value=1000,
+                guinea_pig_id=guinea_pig.id,
+                user=user,
+            ),
+            models.VitaminCEntry(
+                id=1, utc_date=utc_date, local_day=utc_date.date(), user=user
+            ),
+        ]
+    )
+    db.session.commit()  # pylint: disable=no-member
+
+    icons, url = [], "/history?start=2020-01-01&end=2020-01-01"
+    while url:
+        page = client.get(url).get_data(as_text=True)
+        icons.extend(re.findall(r"<td>(🍽️|⚖️|🌻)</td>", page))
+        older = re.search(r'href="([^"]*before=[^"]*)"', page)
+        url = older and html.unescape(older.group(1))
+    assert icons == ["⚖️", "🌻", "🍽️"]
@@ -0,0 +1,129 @@
+"""
+    bulk import of entries
+"""
+import io
+from datetime import datetime, timedelta
+from guineapigs import history, importer, models
+from guineapigs.extensions import db
+
+
+def test_statistics_are_committed_with_each_chunk(app):
+    db.session.add_all(  # pylint: disable=no-member
+        [models.FoodType(label="hay"), models.GuineaPig(name="pig")]
+    )
+    db.session.commit()  # pylint: disable=no-member
+    counts = []
+
+    def rows():
+        for day in range(1, 5):
+            # rows are read lazily, a chunk is committed before the next one
+            # is read
+            counts.append(
+                db.session.query(  # pylint: disable=no-member
+                    db.func.sum(models.FoodStatistic.count)
+                ).scalar()
+            )
+            yield day, {"utc_date": f"2020-01-0{day}", "kind": "food", "value": "hay"}
+
+    importer.import_entries(rows(), chunk_size=2)
+    assert counts == [None, None, 2, 2]
+    assert models.FoodStatistic.query.one().count == 4
+
+
+def rollups():
+    return (
+        sorted(
+            (row.local_day, row.food_type_id, row.guinea_pig_id or 0, row.count)
+            for row in models.FoodRollup.query
+        ),
+        sorted(
+            (row.guinea_pig_id, row.local_day, row.count, row.sum_value)
+            for row in models.WeightRollup.query
+        ),
+    )
+
+
+def entry_rows(days, scatter=True):
+    for line, day in enumerate(days, 1):
+        if scatter:
+            # unsorted and years apart
+            year, month, day_of_month = 2010 + day * 7 % 11, day % 12, day % 28
+            utc_date = f"{year}-{month + 1:02}-{day_of_month + 1:02}T12:00:00"
+        else:
+            utc_date = f"2010-01-01T{day % 24:02}:00:00"
+        kind = "food" if day % 2 else "weight"
+        yield line, {
+            "utc_date": utc_date,
+            "kind": kind,
+            "value": "hay" if kind == "food" else str(1000 + day),
+            "guinea_pigs": "pig",
+        }
+
+
+def test_rollups_of_scattered_days_match_a_rebuild(app):
+    db.session.add_all(  # pylint: disable=no-member
+        [models.FoodType(label="hay"), models.GuineaPig(name="pig")]
+    )
+    db.session.commit()  # pylint: disable=no-member
+    importer.import_entries(entry_rows(range(40)), chunk_size=10)
+    imported = rollups()
+    models.FoodRollup.refresh()
+    models.WeightRollup.rebuild()
+    assert rollups() == imported
+
+
+def test_import_statements_dont_grow_with_days(app, statements):
+    db.session.add_all(  # pylint: disable=no-member
+        [models.FoodType(label="hay"), models.GuineaPig(name="pig")]
+    )
+    db.session.commit()  # pylint: disable=no-member
+    importer.import_entries(entry_rows(range(2)))
+    counts = []
+    for scatter in (False, True):
+        with statements() as executed:
+            importer.import_entries(entry_rows(range(40), scatter))
+        counts.append(len(executed))
+    assert counts[0] == counts[1]
+
+
+def test_an_export_imports_as_it_was(app):
+    user, guinea_pig = models.User(name="test"), models.GuineaPig(name="pig")
+    utc_date = datetime(2020, 1, 1, 12)
+    db.session.add_all(  # pylint: disable=no-member
+        [
+            models.FoodEntry(
+                utc_date=utc_date,
+                food_type=models.FoodType(label="hay"),
+                notes="fresh",
+                guinea_pigs=[guinea_pig],
+                user=user,
+            ),
+            models.WeightEntry(
+                utc_date=utc_date, value=1000, guinea_pig=guinea_pig, user=user
+            ),
+            models.VitaminCEntry(
+                utc_date=utc_date, local_day=utc_date.date(), user=user
+            ),
+        ]
+    )
+    db.session.commit()  # pylint: disable=no-member
+    start, end = utc_date - timedelta(days=1), utc_date + timedelta(days=1)
+
+    def exported():
+        return [row._replace(id=None) for row in history.get_all(start, end)]
+
+    before = exported()
+    csv_text = "".join(history.to_csv(history.get_all(start, end)))
+    for model in (models.FoodEntry, models.WeightEntry, models.VitaminCEntry):
+        for entry in model.query:
+            db.session.delete(entry)  # pylint: disable=no-member
+    db.session.commit()  # pylint: disable=no-member
+
+    rows = importer.read_rows(io.StringIO(csv_text, newline=""), "csv")
+    result = importer.import_entries(rows)
+    assert (result.food_entries, result.weight_entries) == (1, 1)
+    assert result.vitamin_c_entries == 1
+    assert exported() == before
+    # the vitamin c entry of that day is there already
+    rows = importer.read_rows(io.StringIO(csv_text, newline=""), "csv")
+    assert importer.import_entries(rows).vitamin_c_entries == 0
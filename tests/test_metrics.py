@@ -0,0 +1,22 @@
+"""
+    access to /metrics
+"""
+
+
+def test_metrics_are_not_found_without_a_token(app):
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "secret")
+    test_client = app.test_client()
+    assert test_client.get("/metrics").status_code == 401
+    assert (
+        test_client.get(
+            "/metrics", headers={"Authorization": "Bearer wrong"}
+        ).status_code
+        == 401
+    )
+    response = test_client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert b"# TYPE" in response.data
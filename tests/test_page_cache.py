@@ -0,0 +1,36 @@
+"""
+    cached pages follow writes made by other workers
+"""
+from guineapigs import commands, models
+from guineapigs.extensions import db
+
+
+def test_settings_show_food_types_added_by_another_worker(client):
+    assert b"kale" not in client.get("/settings").data
+    # another worker writes without clearing this worker's reference cache
+    db.session.add(models.FoodType(label="kale"))  # pylint: disable=no-member
+    db.session.commit()  # pylint: disable=no-member
+    assert b"kale" in client.get("/settings").data
+
+
+def test_rebuilding_statistics_invalidates_pages_and_etags(app, client):
+    hay, kale = models.FoodType(label="hay"), models.FoodType(label="kale")
+    db.session.add_all(  # pylint: disable=no-member
+        [models.FoodEntry(food_type=hay), kale]
+    )
+    db.session.commit()  # pylint: disable=no-member
+    # a statistic gone wrong, written by a bulk statement that bumps nothing
+    db.session.execute(  # pylint: disable=no-member
+        models.FoodStatistic.__table__.insert(), {"food_type_id": kale.id, "count": 99}
+    )
+    db.session.commit()  # pylint: disable=no-member
+    most_frequent = b"most frequent: </span>"
+    assert most_frequent + b"kale" in client.get("/statistics").data
+    etag = client.get("/api/statistics").headers["ETag"]
+
+    result = app.test_cli_runner().invoke(commands.rebuild_statistics)
+    assert result.exit_code == 0, result.output
+    assert most_frequent + b"hay" in client.get("/statistics").data
+    response = client.get("/api/statistics", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["food"]["most frequent"] == "hay"
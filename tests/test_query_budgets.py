@@ -0,0 +1,95 @@
+"""
+    most SQL statements each write may run, a change making one run more
+    fails here instead of slowing every request down unnoticed
+"""
+import io
+from datetime import datetime
+import pytest
+from guineapigs import models
+from guineapigs.extensions import db
+
+IMPORT_CSV = (
+    b"utc_date,kind,value,guinea_pigs\n"
+    b"2020-01-01T12:00:00,food,hay,pig\n"
+    b"2020-01-01T12:00:00,weight,1000,pig\n"
+)
+
+# name: (method, url, form data, budget)
+WRITES = {
+    "vitamin c toggle": ("GET", "/vitaminc", None, 3),
+    "food entry add": (
+        "POST",
+        "/food_entry/add",
+        {"food_type_id": 1, "guinea_pig_ids": [1]},
+        8,
+    ),
+    "food entry edit": (
+        "POST",
+        "/food_entry/edit/1",
+        {"food_type_id": 1, "guinea_pig_ids": [1], "notes": "edited"},
+        9,
+    ),
+    "food entry delete": ("POST", "/food_entry/delete", {"id": 1}, 7),
+    "weight entry add": (
+        "POST",
+        "/weight_entry/add",
+        {"value": "1000", "guinea_pig_id": 1},
+        5,
+    ),
+    "weight entry edit": (
+        "POST",
+        "/weight_entry/edit/1",
+        {"value": "1100", "guinea_pig_id": 1},
+        6,
+    ),
+    "guinea pig add": ("POST", "/guinea_pig/add", {"name": "other pig"}, 2),
+    "guinea pig edit": ("POST", "/guinea_pig/edit/1", {"name": "renamed"}, 3),
+    "food type add": ("POST", "/food_type/add", {"label": "kale"}, 2),
+    "food type edit": ("POST", "/food_type/edit/1", {"label": "grass"}, 3),
+    "import": (
+        "POST",
+        "/import",
+        lambda: {"file": (io.BytesIO(IMPORT_CSV), "entries.csv")},
+        13,
+    ),
+}
+
+
+@pytest.fixture
+def entries(client):
+    """
+    a food type, a guinea pig, a food and a weight entry (all with id 1),
+    with the user and reference data cached by a first request
+    """
+    guinea_pig = models.GuineaPig(name="pig")
+    food_entry = models.FoodEntry(
+        food_type=models.FoodType(label="hay"), guinea_pigs=[guinea_pig]
+    )
+    weight_entry = models.WeightEntry(
+        utc_date=datetime(2020, 1, 1, 12), value=900, guinea_pig=guinea_pig
+    )
+    db.session.add_all([food_entry, weight_entry])  # pylint: disable=no-member
+    db.session.flush()  # pylint: disable=no-member
+    models.FoodStatistic.add_entry(food_entry.food_type_id, food_entry.utc_date)
+    db.session.commit()  # pylint: disable=no-member
+    models.FoodRollup.refresh()
+    models.WeightRollup.rebuild()
+    db.session.commit()  # pylint: disable=no-member
+    assert client.get("/food_entry/add").status_code == 200
+    return client
+
+
+@pytest.mark.parametrize("name", WRITES)
+def test_write_stays_within_its_query_budget(
+    entries, statements, name
+):  # pylint: disable=redefined-outer-name
+    method, url, data, budget = WRITES[name]
+    if callable(data):
+        data = data()
+    with statements() as executed:
+        response = entries.open(url, method=method, data=data)
+        response.get_data()
+    assert response.status_code in (200, 302)
+    if response.is_json:
+        assert response.json["status"] == "ok"
+    assert len(executed) <= budget, "\n".join(executed)
@@ -0,0 +1,49 @@
+"""
+    pages run the same number of SQL statements whatever the number of rows
+"""
+from datetime import date, timedelta
+import pytest
+from benchmarks.seed import seed
+from conftest import clear_caches, create_tables
+from guineapigs import models
+from guineapigs.extensions import db
+
+PAGES = (
+    "/",
+    f"/history?start={date.today() - timedelta(days=365)}&end={date.today()}",
+    "/statistics",
+)
+
+
+def page_statements(client, statements, url, feedings_per_day):
+    """
+    returns the statements a request to url runs with cold caches, on a
+    year of entries with feedings_per_day food entries a day
+    """
+    db.drop_all()
+    create_tables()
+    client.post("/login", data={"name": "test"})
+    seed(years=1, feedings_per_day=feedings_per_day)
+    # seeded entries fall anywhere in the last day, the dashboard always
+    # gets one so it runs the same statements at any time of day
+    db.session.add(  # pylint: disable=no-member
+        models.FoodEntry(
+            food_type_id=1,
+            user=models.User.query.filter_by(name="test").one(),
+            guinea_pigs=models.GuineaPig.query.limit(1).all(),
+        )
+    )
+    db.session.commit()  # pylint: disable=no-member
+    clear_caches()
+    with statements() as executed:
+        response = client.get(url)
+        response.get_data()
+        response.close()
+    assert response.status_code == 200
+    return len(executed)
+
+
+@pytest.mark.parametrize("url", PAGES)
+def test_statements_do_not_grow_with_rows(client, statements, url):
+    few = page_statements(client, statements, url, 1)
+    assert page_statements(client, statements, url, 10) == few